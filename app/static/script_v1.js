@@ -1,5 +1,19 @@
 console.log("Loded Script_v1.js")
 
+async function waitForJob(statusUrl, status, label) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+
+        if (job.status === "completed" || job.status === "failed") {
+            return job;
+        }
+
+        status.innerText = `Processing ${label}: ${job.stage || job.status} (${Math.round(job.progress * 100)}%)`;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 async function uploaddocument() {
     const fileInput = document.getElementById("pdfFile");
     const status = document.getElementById("uploadStatus");
@@ -15,23 +29,39 @@ async function uploaddocument() {
     status.style.color = "blue";
 
     try {
+        const formData = new FormData();
+
         for (let i = 0; i < fileInput.files.length; i++) {
+            formData.append("files", fileInput.files[i]);
+        }
 
-            const formData = new FormData();
-            formData.append("file", fileInput.files[i]);
+        const response = await fetch("/upload/batch", {
+            method: "POST",
+            body: formData
+        });
+
+        const data = await response.json();
 
-            const response = await fetch("/upload", {
-                method: "POST",
-                body: formData
-            });
+        if (!response.ok) {
+            status.innerText = data.detail || "Upload failed.";
+            status.style.color = "red";
+            return;
+        }
+
+        const job = await waitForJob(data.status_url, status, `${fileInput.files.length} file(s)`);
+
+        if (job.status === "failed") {
+            status.innerText = `Processing failed: ${job.error}`;
+            status.style.color = "red";
+            return;
+        }
 
-            const data = await response.json();
+        const failedFiles = job.result.files.filter(file => file.error);
 
-            if (!response.ok) {
-                status.innerText = data.detail || "Upload failed.";
-                status.style.color = "red";
-                return;
-            }
+        if (failedFiles.length > 0) {
+            status.innerText = "Failed: " + failedFiles.map(file => `${file.source} (${file.error})`).join(", ");
+            status.style.color = "red";
+            return;
         }
 
         status.innerText = "All files uploaded successfully!";
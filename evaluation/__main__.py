@@ -0,0 +1,99 @@
+"""
+Retrieval evaluation: Recall@k, MRR, hallucination rate and latency
+percentiles from one pass over a dataset.
+
+Dataset: JSON list of {"query": ..., "expected_answer": ...}.
+
+Usage:
+    python -m evaluation
+    python -m evaluation --dataset evaluation/datasets/agriculture.json --k 1 3 5 --output eval_report.json
+    python -m evaluation --mode dense --baseline eval_report.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from src.collection import Collection
+from src.models import get_reranker
+from evaluation.dataset import load_dataset
+from evaluation.runner import HYBRID_CANDIDATES, RELEVANCE_THRESHOLD, RERANK_TOP_K, RETRIEVAL_K, Evaluator
+
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(__file__), "datasets", "agriculture.json")
+
+
+def print_report(report: dict, baseline: dict = None):
+
+    print("\n" + "=" * 60)
+    print(f"EVALUATION ({report['queries']} queries, {report['config']['mode']}, {report['config']['vectors']} vectors)")
+    print("=" * 60)
+
+    for name, value in report["metrics"].items():
+        line = f"{name:<22}{value:>10.3f}"
+
+        if baseline and name in baseline.get("metrics", {}):
+            line += f"   ({value - baseline['metrics'][name]:+.3f})"
+
+        print(line)
+
+    print("-" * 60)
+    print(f"{'Latency ms':<14}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+
+    for stage, summary in report["latency_ms"].items():
+        line = f"{stage:<14}{summary['mean']:>9.2f}{summary['p50']:>9.2f}{summary['p95']:>9.2f}{summary['p99']:>9.2f}"
+
+        if baseline and stage in baseline.get("latency_ms", {}):
+            line += f"   (p95 {summary['p95'] - baseline['latency_ms'][stage]['p95']:+.2f})"
+
+        print(line)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--persist-dir", default="faiss_store", help="store or collection directory")
+    parser.add_argument("--mode", choices=("dense", "hybrid"), default="hybrid")
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 3], help="recall@k / mrr@k cut-offs")
+    parser.add_argument("--retrieval-k", type=int, default=RETRIEVAL_K, help="chunks retrieved and reranked per query")
+    parser.add_argument("--candidates", type=int, default=HYBRID_CANDIDATES, help="per-list depth before fusion (hybrid)")
+    parser.add_argument("--context-k", type=int, default=RERANK_TOP_K, help="reranked chunks the answer is generated from")
+    parser.add_argument("--relevance", type=float, default=RELEVANCE_THRESHOLD)
+    parser.add_argument("--output", default="eval_report.json")
+    parser.add_argument("--baseline", help="earlier report to print deltas against")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.persist_dir):
+        parser.error(f"No store at {args.persist_dir}")
+
+    dataset = load_dataset(args.dataset)
+
+    store = Collection(os.path.basename(os.path.normpath(args.persist_dir)), args.persist_dir)
+
+    evaluator = Evaluator(
+        store,
+        get_reranker(),
+        mode=args.mode,
+        retrieval_k=args.retrieval_k,
+        candidates=args.candidates
+    )
+
+    report = evaluator.run(dataset, ks=args.k, relevance=args.relevance, context_k=args.context_k)
+    report["dataset"] = args.dataset
+    report["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[INFO] Report written to {args.output}")
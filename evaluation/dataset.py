@@ -0,0 +1,20 @@
+import json
+
+
+def load_dataset(path: str) -> list:
+    """
+    Evaluation items from a JSON file: a list of
+    {"query": ..., "expected_answer": ...}.
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a JSON list of evaluation items")
+
+    for i, item in enumerate(data):
+        missing = {"query", "expected_answer"} - set(item)
+        if missing:
+            raise ValueError(f"{path}: item {i} is missing {', '.join(sorted(missing))}")
+
+    return data
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def first_relevant_rank(similarities, threshold: float):
+    """
+    1-based rank of the first result whose similarity to the expected
+    answer is ≥ threshold, or None when no result is relevant.
+    """
+    for rank, similarity in enumerate(similarities, start=1):
+        if similarity >= threshold:
+            return rank
+    return None
+
+
+def recall_at_k(ranks: list, k: int) -> float:
+    """
+    Fraction of queries with a relevant result in the top k.
+    """
+    return sum(rank is not None and rank <= k for rank in ranks) / len(ranks)
+
+
+def mean_reciprocal_rank(ranks: list, k: int = None) -> float:
+    """
+    Mean of 1 / rank of the first relevant result (0 when there is none,
+    or when it ranks below k).
+    """
+    return sum(
+        1.0 / rank
+        for rank in ranks
+        if rank is not None and (k is None or rank <= k)
+    ) / len(ranks)
+
+
+def hallucination_rate(supported: list) -> float:
+    """
+    Fraction of queries whose answer context has no chunk supporting
+    the expected answer, so any answer would not be grounded in it.
+    """
+    return sum(not flag for flag in supported) / len(supported)
+
+
+def latency_summary(values_ms: list) -> dict:
+    values = np.asarray(values_ms, dtype="float64")
+
+    return {
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p90": round(float(np.percentile(values, 90)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "max": round(float(values.max()), 2)
+    }
@@ -0,0 +1,213 @@
+import time
+
+from src.models import encode_queries
+from evaluation.metrics import (
+    first_relevant_rank,
+    hallucination_rate,
+    latency_summary,
+    mean_reciprocal_rank,
+    recall_at_k
+)
+
+
+# Same defaults as the query path in main.py
+RETRIEVAL_K = 6
+RERANK_TOP_K = 3
+HYBRID_CANDIDATES = 20
+
+RELEVANCE_THRESHOLD = 0.68
+
+
+class Evaluator:
+    """
+    Runs every query of a dataset through embed → retrieve → rerank
+    once, then scores recall@k, MRR, hallucination rate and latency
+    from that single pass.
+
+    Relevance is semantic: a retrieved chunk is relevant when its
+    embedding has cosine ≥ `relevance` with the expected answer. The
+    expected answers are encoded in one batch and each retrieved chunk
+    once, cached by vector id, however many queries retrieve it.
+
+    `store` is a FaissVectorStore or a Collection.
+    """
+
+    def __init__(
+        self,
+        store,
+        reranker,
+        mode: str = "hybrid",
+        retrieval_k: int = RETRIEVAL_K,
+        candidates: int = HYBRID_CANDIDATES
+    ):
+        if mode not in ("dense", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+
+        self.store = store
+        self.reranker = reranker
+        self.mode = mode
+        self.retrieval_k = retrieval_k
+        self.candidates = candidates
+
+        self.chunk_embeddings = {}   # (shard, vector id) → embedding
+
+    # RETRIEVAL
+
+    def retrieve(self, query: str):
+        """
+        The serving path for one query. Returns (reranked results,
+        stage timings in ms).
+        """
+        start = time.perf_counter()
+
+        query_embedding = encode_queries([query])
+
+        embedded = time.perf_counter()
+
+        if self.mode == "hybrid":
+            results, _ = self.store.hybrid_search(
+                query,
+                top_k=self.retrieval_k,
+                candidates=max(self.retrieval_k, self.candidates),
+                query_embedding=query_embedding
+            )
+        else:
+            results = self.store.search(query, top_k=self.retrieval_k, query_embedding=query_embedding)
+
+        retrieved = time.perf_counter()
+
+        if results:
+            scores = self.reranker.predict([[query, doc["text"]] for doc in results], batch_size=64)
+
+            for doc, score in zip(results, scores):
+                doc["rerank_score"] = float(score)
+
+            results = sorted(results, key=lambda doc: doc["rerank_score"], reverse=True)
+
+        reranked = time.perf_counter()
+
+        return results, {
+            "embed": (embedded - start) * 1000,
+            "retrieval": (retrieved - embedded) * 1000,
+            "rerank": (reranked - retrieved) * 1000,
+            "total": (reranked - start) * 1000
+        }
+
+    # CHUNK EMBEDDINGS
+
+    @staticmethod
+    def _chunk_key(doc: dict) -> tuple:
+        return doc.get("shard", 0), doc["id"]
+
+    def embed_chunks(self, result_lists: list):
+        """
+        Encode, in one call, every retrieved chunk not already cached.
+        """
+        missing = {}
+
+        for results in result_lists:
+            for doc in results:
+                key = self._chunk_key(doc)
+                if key not in self.chunk_embeddings:
+                    missing[key] = doc["text"]
+
+        if missing:
+            for key, embedding in zip(missing, encode_queries(list(missing.values()))):
+                self.chunk_embeddings[key] = embedding
+
+    # EVALUATION
+
+    def run(
+        self,
+        dataset: list,
+        ks: tuple = (1, 3),
+        relevance: float = RELEVANCE_THRESHOLD,
+        context_k: int = RERANK_TOP_K
+    ) -> dict:
+        """
+        Evaluate `dataset` ([{"query", "expected_answer"}]). `context_k`
+        is the number of reranked chunks the answer is generated from;
+        a query counts as a hallucination when none of them supports
+        the expected answer.
+        """
+
+        # Warm-up so the first timed query excludes lazy initialisation
+        encode_queries(["warm up"])
+        self.reranker.predict([["warm up", "warm up"]])
+
+        queries = [item["query"].strip().lower() for item in dataset]
+
+        result_lists = []
+        timings = []
+
+        for query in queries:
+            results, timing = self.retrieve(query)
+            result_lists.append(results)
+            timings.append(timing)
+
+        # Everything below is scoring, outside the timed path
+        answer_embeddings = encode_queries([item["expected_answer"] for item in dataset])
+        self.embed_chunks(result_lists)
+
+        ranks = []
+        supported = []
+        per_query = []
+
+        for item, query, results, timing, answer_embedding in zip(dataset, queries, result_lists, timings, answer_embeddings):
+
+            similarities = [
+                float(self.chunk_embeddings[self._chunk_key(doc)] @ answer_embedding)
+                for doc in results
+            ]
+
+            rank = first_relevant_rank(similarities, relevance)
+            is_supported = rank is not None and rank <= context_k
+
+            ranks.append(rank)
+            supported.append(is_supported)
+
+            per_query.append({
+                "query": query,
+                "expected_answer": item["expected_answer"],
+                "first_relevant_rank": rank,
+                "supported": is_supported,
+                "latency_ms": {stage: round(ms, 2) for stage, ms in timing.items()},
+                "results": [
+                    {
+                        "id": doc["id"],
+                        "source": doc.get("source"),
+                        "page": doc.get("page"),
+                        "rerank_score": round(doc["rerank_score"], 4),
+                        "similarity": round(similarity, 4)
+                    }
+                    for doc, similarity in zip(results, similarities)
+                ]
+            })
+
+        metrics = {}
+
+        for k in sorted(set(ks)):
+            metrics[f"recall@{k}"] = round(recall_at_k(ranks, k), 4)
+            metrics[f"mrr@{k}"] = round(mean_reciprocal_rank(ranks, k), 4)
+
+        metrics["mrr"] = round(mean_reciprocal_rank(ranks), 4)
+        metrics["hallucination_rate"] = round(hallucination_rate(supported), 4)
+
+        return {
+            "config": {
+                "mode": self.mode,
+                "retrieval_k": self.retrieval_k,
+                "candidates": self.candidates,
+                "context_k": context_k,
+                "relevance": relevance,
+                "vectors": self.store.ntotal
+            },
+            "queries": len(dataset),
+            "metrics": metrics,
+            "latency_ms": {
+                stage: latency_summary([timing[stage] for timing in timings])
+                for stage in ("embed", "retrieval", "rerank", "total")
+            },
+            "chunks_encoded": len(self.chunk_embeddings),
+            "per_query": per_query
+        }
@@ -0,0 +1,170 @@
+"""
+Rerank cost at equal recall: dense-only vs hybrid (dense + BM25, RRF).
+
+For every candidate depth, each method retrieves that many chunks per
+query, the cross-encoder reranks all of them and we measure recall@k
+after reranking plus the rerank time. A chunk is relevant when its
+embedding has cosine ≥ --relevance with the expected answer (the same
+check as the evaluation package).
+
+The report ends with the smallest depth at which each method reaches
+the target recall (default: the best recall dense-only reaches at any
+depth) and the rerank time it costs there.
+
+Dataset: JSON list of {"query": ..., "expected_answer": ...}
+(default: evaluation/datasets/agriculture.json).
+
+Usage:
+    python hybrid_benchmark.py
+    python hybrid_benchmark.py --dataset my_questions.json --depths 3 4 6 10 20 --k 3 --json hybrid_report.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from evaluation.dataset import load_dataset
+from evaluation.runner import RELEVANCE_THRESHOLD
+from src.models import encode_queries, get_reranker
+from src.vectorstore import FaissVectorStore
+
+
+METHODS = ("dense", "hybrid")
+
+
+def retrieve(store, method, query, query_embedding, depth, candidates):
+
+    if method == "dense":
+        return store.search(query, top_k=depth, query_embedding=query_embedding)
+
+    results, _ = store.hybrid_search(
+        query,
+        top_k=depth,
+        candidates=max(depth, candidates),
+        query_embedding=query_embedding
+    )
+    return results
+
+
+def run(store, reranker, dataset, query_embeddings, answer_embeddings, method, depth, k, candidates, relevance, chunk_embeddings):
+
+    candidate_hits = 0
+    rerank_hits = 0
+    rerank_ms = []
+
+    for item, query_embedding, answer_embedding in zip(dataset, query_embeddings, answer_embeddings):
+
+        query = item["query"].strip().lower()
+        results = retrieve(store, method, query, query_embedding, depth, candidates)
+
+        if not results:
+            rerank_ms.append(0.0)
+            continue
+
+        # Chunk embeddings are encoded once per vector id across all runs
+        missing = [doc for doc in results if doc["id"] not in chunk_embeddings]
+        if missing:
+            for doc, emb in zip(missing, encode_queries([doc["text"] for doc in missing])):
+                chunk_embeddings[doc["id"]] = emb
+
+        relevant = {
+            doc["id"] for doc in results
+            if float(chunk_embeddings[doc["id"]] @ answer_embedding) >= relevance
+        }
+
+        start = time.perf_counter()
+        scores = reranker.predict([[query, doc["text"]] for doc in results], batch_size=64)
+        rerank_ms.append((time.perf_counter() - start) * 1000)
+
+        order = np.argsort(-np.asarray(scores))[:k]
+
+        candidate_hits += bool(relevant)
+        rerank_hits += any(results[i]["id"] in relevant for i in order)
+
+    n = len(dataset)
+
+    return {
+        "method": method,
+        "depth": depth,
+        "candidate_recall": round(candidate_hits / n, 4),
+        f"recall@{k}": round(rerank_hits / n, 4),
+        "rerank_ms_mean": round(float(np.mean(rerank_ms)), 2),
+        "rerank_ms_p95": round(float(np.percentile(rerank_ms, 95)), 2)
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="evaluation/datasets/agriculture.json")
+    parser.add_argument("--persist-dir", default="faiss_store")
+    parser.add_argument("--depths", nargs="+", type=int, default=[3, 4, 6, 10, 20, 30])
+    parser.add_argument("--k", type=int, default=3, help="recall@k after reranking")
+    parser.add_argument("--candidates", type=int, default=20, help="per-list depth before fusion (hybrid)")
+    parser.add_argument("--relevance", type=float, default=RELEVANCE_THRESHOLD)
+    parser.add_argument("--target", type=float, help="recall@k to compare rerank cost at")
+    parser.add_argument("--json", help="also write the report rows to this file")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+
+    store = FaissVectorStore(args.persist_dir)
+    store.load()
+
+    reranker = get_reranker()
+
+    # Queries and expected answers are encoded once, in two batched calls
+    query_embeddings = encode_queries([item["query"].strip().lower() for item in dataset])
+    answer_embeddings = encode_queries([item["expected_answer"] for item in dataset])
+
+    # Warm-up so the first timed rerank excludes lazy initialisation
+    reranker.predict([["warm up", "warm up"]])
+
+    chunk_embeddings = {}
+    rows = []
+
+    for method in METHODS:
+        for depth in sorted(set(args.depths)):
+            rows.append(run(
+                store, reranker, dataset, query_embeddings, answer_embeddings,
+                method, depth, args.k, args.candidates, args.relevance, chunk_embeddings
+            ))
+
+    recall_key = f"recall@{args.k}"
+
+    print("\n" + "=" * 72)
+    print(f"DENSE vs HYBRID ({len(dataset)} queries, {store.ntotal} vectors)")
+    print("=" * 72)
+    print(f"{'Method':<10}{'Depth':>7}{'Cand. recall':>14}{recall_key:>12}{'Rerank ms':>12}{'p95 ms':>10}")
+    print("-" * 72)
+
+    for row in rows:
+        print(
+            f"{row['method']:<10}{row['depth']:>7}{row['candidate_recall']:>14.3f}"
+            f"{row[recall_key]:>12.3f}{row['rerank_ms_mean']:>12.2f}{row['rerank_ms_p95']:>10.2f}"
+        )
+
+    target = args.target
+    if target is None:
+        target = max(row[recall_key] for row in rows if row["method"] == "dense")
+
+    print("-" * 72)
+    print(f"Smallest depth reaching {recall_key} ≥ {target:.3f}:")
+
+    for method in METHODS:
+        reached = [row for row in rows if row["method"] == method and row[recall_key] >= target]
+
+        if reached:
+            best = min(reached, key=lambda row: row["depth"])
+            print(f"  {method:<8} depth {best['depth']:>3} → {best['rerank_ms_mean']:.2f} ms rerank per query")
+        else:
+            print(f"  {method:<8} not reached")
+
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"target": target, "rows": rows}, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
@@ -0,0 +1,203 @@
+"""
+Recall@k vs latency report for the FAISS index types.
+
+Every ANN configuration is compared against the exact IndexFlatIP over
+the same vectors, so the numbers show how much recall each nprobe /
+efSearch setting trades for speed on our own corpus.
+
+Usage:
+    python index_benchmark.py                      # vectors from faiss_store/
+    python index_benchmark.py --synthetic 200000   # random clustered corpus
+    python index_benchmark.py --json report.json
+"""
+
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from src.vectorstore import FaissVectorStore, build_index, search_params
+
+
+# SETTINGS GRID
+
+NPROBE_VALUES = [1, 4, 8, 16, 32, 64]
+EF_SEARCH_VALUES = [16, 32, 64, 128, 256]
+
+
+# DATA
+
+def load_store_vectors(persist_dir):
+
+    store = FaissVectorStore(persist_dir)
+    store.load()
+
+    vectors = np.concatenate([
+        segment.read_vectors()[1] for segment in store.segments
+    ])
+
+    print(f"[INFO] Loaded {vectors.shape[0]} vectors from {persist_dir}")
+
+    return np.ascontiguousarray(vectors, dtype="float32")
+
+
+def synthetic_vectors(n, dimension=384, n_clusters=256, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    centers = rng.standard_normal((n_clusters, dimension)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dimension)).astype("float32")
+    faiss.normalize_L2(vectors)
+
+    print(f"[INFO] Generated {n} synthetic vectors (d={dimension})")
+
+    return vectors
+
+
+def make_queries(vectors, n_queries, seed=1):
+    """
+    Queries are perturbed copies of stored vectors, which mimics a user
+    question landing near (but not exactly on) a chunk.
+    """
+    rng = np.random.default_rng(seed)
+
+    picks = rng.choice(vectors.shape[0], size=min(n_queries, vectors.shape[0]), replace=False)
+
+    queries = vectors[picks] + 0.1 * rng.standard_normal((len(picks), vectors.shape[1])).astype("float32")
+    faiss.normalize_L2(queries)
+
+    return np.ascontiguousarray(queries, dtype="float32")
+
+
+# MEASUREMENT
+
+def timed_search(index, queries, k, params=None):
+    """
+    One query at a time, like the /search endpoint.
+    """
+    latencies = []
+    ids = np.empty((queries.shape[0], k), dtype="int64")
+
+    for i in range(queries.shape[0]):
+
+        start = time.perf_counter()
+
+        _, I = index.search(queries[i:i + 1], k, params=params)
+
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids[i] = I[0]
+
+    return ids, latencies
+
+
+def recall_at_k(approx_ids, exact_ids, k):
+
+    hits = 0
+
+    for approx, exact in zip(approx_ids, exact_ids):
+        hits += len(set(approx[:k]) & set(exact[:k]))
+
+    return hits / (exact_ids.shape[0] * k)
+
+
+def report_row(name, setting, recall, latencies, build_time):
+
+    return {
+        "index": name,
+        "setting": setting,
+        "recall": round(recall, 4),
+        "avg_latency_ms": round(float(np.mean(latencies)), 4),
+        "p95_latency_ms": round(float(np.percentile(latencies, 95)), 4),
+        "build_s": round(build_time, 3)
+    }
+
+
+def run_benchmark(vectors, queries, k, index_types):
+
+    rows = []
+
+    # Exact baseline
+    start = time.perf_counter()
+    flat = build_index("flat", vectors)
+    flat_build = time.perf_counter() - start
+
+    exact_ids, latencies = timed_search(flat, queries, k)
+    rows.append(report_row("flat", "-", 1.0, latencies, flat_build))
+
+    for index_type in index_types:
+
+        start = time.perf_counter()
+        index = build_index(index_type, vectors)
+        build_time = time.perf_counter() - start
+
+        if index_type == "hnsw":
+            grid = [("efSearch", ef, search_params(index, ef_search=ef)) for ef in EF_SEARCH_VALUES]
+        else:
+            grid = [
+                ("nprobe", nprobe, search_params(index, nprobe=nprobe))
+                for nprobe in NPROBE_VALUES
+                if nprobe <= index.nlist
+            ]
+
+        for param_name, value, params in grid:
+
+            ids, latencies = timed_search(index, queries, k, params=params)
+
+            rows.append(report_row(
+                index_type,
+                f"{param_name}={value}",
+                recall_at_k(ids, exact_ids, k),
+                latencies,
+                build_time
+            ))
+
+    return rows
+
+
+def print_report(rows, k, n_vectors):
+
+    print("\n" + "=" * 78)
+    print(f"RECALL@{k} vs LATENCY ({n_vectors} vectors, exact IndexFlatIP baseline)")
+    print("=" * 78)
+    print(f"{'Index':<8}{'Setting':<16}{'Recall':>10}{'Avg ms':>12}{'P95 ms':>12}{'Build s':>12}")
+    print("-" * 78)
+
+    for row in rows:
+        print(
+            f"{row['index']:<8}{row['setting']:<16}{row['recall']:>10.4f}"
+            f"{row['avg_latency_ms']:>12.4f}{row['p95_latency_ms']:>12.4f}{row['build_s']:>12.3f}"
+        )
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="faiss_store")
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N random vectors instead of the store")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--types", nargs="+", default=["hnsw", "ivf", "ivfpq"])
+    parser.add_argument("--json", help="also write the report rows to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic)
+    else:
+        vectors = load_store_vectors(args.persist_dir)
+
+    queries = make_queries(vectors, args.queries)
+
+    rows = run_benchmark(vectors, queries, args.k, args.types)
+
+    print_report(rows, args.k, vectors.shape[0])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"k": args.k, "n_vectors": int(vectors.shape[0]), "rows": rows}, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
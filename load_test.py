@@ -0,0 +1,346 @@
+"""
+Load test for the query / upload API.
+
+Drives /search (and, with --upload-ratio, /upload) either at a fixed
+request rate (--rate: open loop, requests start on schedule whether or
+not earlier ones finished, and latency is measured from the scheduled
+start so queueing is not hidden) or, without --rate, as fast as
+--concurrency in-flight requests allow (closed loop).
+
+By default main.app is served in-process over an ASGI transport with
+LLM_BACKEND=mock, so no Groq quota is spent; --mock-delay-ms sets the
+stand-in's response time. --url targets a running server instead
+(start it with LLM_BACKEND=mock for the same effect).
+
+Reports throughput, error rate, cache hit rate (client-observed and
+from /cache/stats), client latency percentiles per endpoint and the
+server's per-stage percentiles from the /search latency breakdown.
+Uploads of identical content are deduplicated by the server; pass
+distinct files to load ingestion.
+
+Usage:
+    python load_test.py --duration 30 --concurrency 16
+    python load_test.py --rate 20 --duration 60 --mock-delay-ms 800
+    python load_test.py --rate 10 --upload-ratio 0.05 --upload-files data/lease.pdf --collection loadtest
+    python load_test.py --url http://localhost:8000 --rate 50 --json load_report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from evaluation.dataset import load_dataset
+from evaluation.metrics import latency_summary
+
+
+STAGES = ("embedding_ms", "retrieval_ms", "rerank_ms", "generation_ms", "total_ms")
+
+
+class LoadStats:
+
+    def __init__(self):
+        self.client_ms = defaultdict(list)      # endpoint → client latency
+        self.stage_ms = defaultdict(list)       # stage → server latency (uncached searches)
+        self.requests = Counter()
+        self.succeeded = Counter()
+        self.errors = Counter()                 # endpoint → failed requests
+        self.error_kinds = Counter()
+        self.cached = 0
+        self.ingest_ms = []
+        self.ingest_failed = 0
+
+    def record_error(self, endpoint: str, kind: str):
+        self.errors[endpoint] += 1
+        self.error_kinds[f"{endpoint}: {kind}"] += 1
+
+
+# REQUESTS
+
+async def search(client, stats, query: str, collection: str, scheduled: float):
+
+    stats.requests["search"] += 1
+
+    try:
+        response = await client.post("/search", json={"query": query, "collection": collection})
+    except httpx.HTTPError as e:
+        stats.record_error("search", type(e).__name__)
+        return
+
+    stats.client_ms["search"].append((time.perf_counter() - scheduled) * 1000)
+
+    if response.status_code != 200:
+        stats.record_error("search", str(response.status_code))
+        return
+
+    stats.succeeded["search"] += 1
+    body = response.json()
+
+    if body.get("cached"):
+        stats.cached += 1
+        return
+
+    for stage in STAGES:
+        if stage in body.get("latency", {}):
+            stats.stage_ms[stage].append(body["latency"][stage])
+
+
+async def wait_for_job(client, stats, status_url: str, poll_s: float = 0.25):
+
+    while True:
+        await asyncio.sleep(poll_s)
+
+        try:
+            job = (await client.get(status_url)).json()
+        except httpx.HTTPError:
+            stats.ingest_failed += 1
+            return
+
+        if job["status"] == "completed":
+            stats.ingest_ms.append((job["finished_at"] - job["created_at"]) * 1000)
+            return
+
+        if job["status"] == "failed":
+            stats.ingest_failed += 1
+            return
+
+
+async def upload(client, stats, path: str, data: bytes, n: int, collection: str, scheduled: float, jobs: list):
+
+    stats.requests["upload"] += 1
+
+    # Unique names, so concurrent uploads never write the same file
+    filename = f"loadtest_{n:06d}_{os.path.basename(path)}"
+
+    try:
+        response = await client.post(
+            "/upload",
+            params={"collection": collection},
+            files={"file": (filename, data, "application/pdf")}
+        )
+    except httpx.HTTPError as e:
+        stats.record_error("upload", type(e).__name__)
+        return
+
+    stats.client_ms["upload"].append((time.perf_counter() - scheduled) * 1000)
+
+    if response.status_code != 200:
+        stats.record_error("upload", str(response.status_code))
+        return
+
+    stats.succeeded["upload"] += 1
+    jobs.append(asyncio.create_task(wait_for_job(client, stats, response.json()["status_url"])))
+
+
+# LOAD GENERATOR
+
+async def generate_load(client, args, queries: list, uploads: list) -> tuple:
+
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+
+    limit = asyncio.Semaphore(args.concurrency)
+    tasks = []
+    jobs = []
+
+    async def issue(n: int, scheduled: float, acquired: bool):
+        if not acquired:
+            await limit.acquire()
+
+        try:
+            if uploads and rng.random() < args.upload_ratio:
+                path, data = rng.choice(uploads)
+                await upload(client, stats, path, data, n, args.collection, scheduled, jobs)
+            else:
+                await search(client, stats, rng.choice(queries), args.collection, scheduled)
+        finally:
+            limit.release()
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    n = 0
+
+    while time.perf_counter() < deadline and (args.requests is None or n < args.requests):
+
+        if args.rate:
+            scheduled = start + n / args.rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        else:
+            # Closed loop: the next request starts when a slot frees up
+            await limit.acquire()
+            scheduled = time.perf_counter()
+
+        tasks.append(asyncio.create_task(issue(n, scheduled, acquired=not args.rate)))
+        n += 1
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if jobs:
+        print(f"[INFO] Waiting for {len(jobs)} ingestion jobs...")
+        await asyncio.gather(*jobs)
+
+    return stats, elapsed
+
+
+def cache_counts(cache_stats: dict, collection: str) -> dict:
+    caches = cache_stats.get("collections", {}).get(collection)
+
+    if caches is None:
+        return {"response_hits": 0, "response_misses": 0, "retrieval_hits": 0, "retrieval_misses": 0}
+
+    return {
+        "response_hits": caches["response"]["exact_hits"] + caches["response"]["semantic_hits"],
+        "response_misses": caches["response"]["misses"],
+        "retrieval_hits": caches["retrieval"]["hits"],
+        "retrieval_misses": caches["retrieval"]["misses"]
+    }
+
+
+def build_report(args, stats: LoadStats, elapsed: float, before: dict, after: dict) -> dict:
+
+    total_requests = sum(stats.requests.values())
+    total_errors = sum(stats.errors.values())
+    completed_searches = stats.succeeded["search"]
+
+    server = {key: after[key] - before[key] for key in after}
+    response_lookups = server["response_hits"] + server["response_misses"]
+    retrieval_lookups = server["retrieval_hits"] + server["retrieval_misses"]
+
+    return {
+        "config": {
+            "target": args.url or "in-process",
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "upload_ratio": args.upload_ratio if args.upload_files else 0.0,
+            "mock_delay_ms": None if args.url else args.mock_delay_ms,
+            "collection": args.collection
+        },
+        "elapsed_s": round(elapsed, 2),
+        "requests": dict(stats.requests),
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "errors": dict(stats.error_kinds),
+        "cache": {
+            "search_hit_rate": round(stats.cached / completed_searches, 4) if completed_searches > 0 else 0.0,
+            "server_response_hit_rate": round(server["response_hits"] / response_lookups, 4) if response_lookups else 0.0,
+            "server_retrieval_hit_rate": round(server["retrieval_hits"] / retrieval_lookups, 4) if retrieval_lookups else 0.0
+        },
+        "client_latency_ms": {
+            endpoint: latency_summary(values)
+            for endpoint, values in stats.client_ms.items() if values
+        },
+        "stage_latency_ms": {
+            stage: latency_summary(values)
+            for stage, values in stats.stage_ms.items() if values
+        },
+        "ingestion": {
+            "completed": len(stats.ingest_ms),
+            "failed": stats.ingest_failed,
+            "latency_ms": latency_summary(stats.ingest_ms) if stats.ingest_ms else None
+        }
+    }
+
+
+def print_report(report: dict):
+
+    print("\n" + "=" * 64)
+    print(f"LOAD TEST ({report['config']['target']}, {report['elapsed_s']} s)")
+    print("=" * 64)
+    print(f"Requests        {sum(report['requests'].values())}  {report['requests']}")
+    print(f"Throughput      {report['throughput_rps']:.2f} req/s")
+    print(f"Error rate      {report['error_rate']:.2%}")
+    print(f"Cache hit rate  {report['cache']['search_hit_rate']:.2%} of searches "
+          f"(server: response {report['cache']['server_response_hit_rate']:.2%}, "
+          f"retrieval {report['cache']['server_retrieval_hit_rate']:.2%})")
+
+    for title, rows in (("Client latency ms", report["client_latency_ms"]), ("Server stage ms (uncached)", report["stage_latency_ms"])):
+        print("-" * 64)
+        print(f"{title:<28}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+
+        for name, summary in rows.items():
+            print(f"{name:<28}{summary['p50']:>9.2f}{summary['p95']:>9.2f}{summary['p99']:>9.2f}{summary['max']:>9.2f}")
+
+    if report["ingestion"]["latency_ms"]:
+        summary = report["ingestion"]["latency_ms"]
+        print("-" * 64)
+        print(f"Ingestion jobs: {report['ingestion']['completed']} completed, {report['ingestion']['failed']} failed, "
+              f"p50 {summary['p50']:.0f} ms, p95 {summary['p95']:.0f} ms")
+
+    for kind, count in report["errors"].items():
+        print(f"[ERROR] {kind} × {count}")
+
+    print("=" * 64)
+
+
+async def main(args):
+
+    queries = [item["query"] for item in load_dataset(args.dataset)]
+
+    uploads = []
+    for path in args.upload_files or []:
+        with open(path, "rb") as f:
+            uploads.append((path, f.read()))
+
+    if args.url:
+        transport = None
+        base_url = args.url
+        app_module = None
+    else:
+        # Configured before main is imported, which builds the LLM client
+        os.environ.setdefault("LLM_BACKEND", "mock")
+        os.environ["MOCK_LLM_DELAY_MS"] = str(args.mock_delay_ms)
+        os.environ["MOCK_LLM_JITTER_MS"] = str(args.mock_jitter_ms)
+
+        import main as app_module
+
+        transport = httpx.ASGITransport(app=app_module.app)
+        base_url = "http://loadtest"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+
+        before = cache_counts((await client.get("/cache/stats")).json(), args.collection)
+
+        stats, elapsed = await generate_load(client, args, queries, uploads)
+
+        after = cache_counts((await client.get("/cache/stats")).json(), args.collection)
+
+    if app_module is not None:
+        app_module.shutdown_workers()
+
+    return build_report(args, stats, elapsed, before, after)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="running server; default serves main.app in-process")
+    parser.add_argument("--rate", type=float, help="requests per second (open loop); default closed loop")
+    parser.add_argument("--concurrency", type=int, default=8, help="max in-flight requests")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to generate load for")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--dataset", default="evaluation/datasets/agriculture.json", help="queries to sample from")
+    parser.add_argument("--collection", default="default")
+    parser.add_argument("--upload-files", nargs="*", help="PDFs to upload")
+    parser.add_argument("--upload-ratio", type=float, default=0.0, help="fraction of requests that are uploads")
+    parser.add_argument("--mock-delay-ms", type=float, default=500, help="mock LLM response time (in-process)")
+    parser.add_argument("--mock-jitter-ms", type=float, default=100)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
@@ -1,13 +1,16 @@
-from fastapi import FastAPI, Request, UploadFile, File
-from fastapi.responses import HTMLResponse
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel
 import os
+import json
+import threading
+import asyncio
 import numpy as np
 from dotenv import load_dotenv
-from groq import Groq
-from sentence_transformers import CrossEncoder, SentenceTransformer
 import time
 
 # ENV & APP SETUP
@@ -22,59 +25,363 @@ UPLOAD_DIR = "data"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # LOAD RAG COMPONENTS
-from src.data_loaders import DataLoader
 from src.embeddings import EmbeddingPipeline
-from src.vectorstore import FaissVectorStore
-
-embedding_pipeline = EmbeddingPipeline()
-vector_store = FaissVectorStore("faiss_store")
+from src.embedding_cache import EmbeddingCache
+from src.collection import CollectionRegistry
+from src.models import RERANK_MODEL_NAME, encode_queries, get_reranker
+from src.cache import LRUCache, SemanticCache
+from src.concurrency import StagePool
+from src.batching import MicroBatcher, flatten_batches
+from src.ingestion import INGEST_STAGES, STREAM_STAGES, IngestionPipeline
+from src.jobs import JobManager
+from src.retrieval import keyword_terms
+from src.llm import LLM_BACKEND, get_llm_client
+from src.metrics import REQUESTS_IN_FLIGHT, StatsCollector, observe_stages, register_collector, render
+from src.tracing import tracer
+from src.profiling import ProfileManager
+from src.startup import WarmUp
+
+# Chunk embeddings keyed by (model, chunk hash): re-uploads and new
+# revisions of a file only encode the chunks that changed
+os.makedirs("faiss_store", exist_ok=True)
+embedding_cache = EmbeddingCache("faiss_store/embedding_cache.db")
+
+embedding_pipeline = EmbeddingPipeline(cache=embedding_cache)
+
+# Each segment stays an exact IndexFlatIP until it holds ANN_THRESHOLD
+# vectors; larger segments (e.g. the merged one after compaction) are
+# built as HNSW graphs (see index_benchmark.py)
+VECTOR_INDEX_TYPE = "hnsw"
+ANN_THRESHOLD = 50_000
+
+# COLLECTIONS
+# Every named collection has its own index, chunk store and caches, so
+# one client's large corpus does not slow down everyone else's queries.
+# "default" is the original faiss_store/. A collection created with
+# shards > 1 routes documents to shards by source name and searches the
+# shards in parallel, merged by score.
+
+DEFAULT_COLLECTION = "default"
+COLLECTIONS_DIR = "collections"
+
+collections = CollectionRegistry(
+    COLLECTIONS_DIR,
+    default_name=DEFAULT_COLLECTION,
+    default_dir="faiss_store",
+    index_type=VECTOR_INDEX_TYPE,
+    ann_threshold=ANN_THRESHOLD
+)
 
 # MODELS
+# Shared with embedding_pipeline / the vector stores through src.models,
+# so each model is loaded once per process, on first use (the startup
+# warm-up below loads them in the background)
+
 
-RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
-reranker = CrossEncoder(RERANK_MODEL_NAME)
+def rerank(pairs: list):
+    return get_reranker(RERANK_MODEL_NAME).predict(pairs, batch_size=64)
 
-query_embedder = SentenceTransformer("BAAI/bge-small-en-v1.5")
 
 RETRIEVAL_K = 6
 RERANK_TOP_K = 3
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# HYBRID RETRIEVAL
+# Dense (FAISS) and BM25 keyword candidates, HYBRID_CANDIDATES deep
+# each, are fused with reciprocal rank fusion and only the fused top
+# RETRIEVAL_K go to the cross-encoder. Keyword search catches clause
+# numbers, addresses and parcel ids that embeddings miss (compare
+# candidate depths with hybrid_benchmark.py)
+
+HYBRID_RETRIEVAL = True
+HYBRID_CANDIDATES = 20
+
+# LLM
+# LLM_BACKEND=mock replaces Groq with a local stand-in answering after
+# MOCK_LLM_DELAY_MS, so load tests (load_test.py) spend no quota
+
+_llm_client = None
+
+
+def llm():
+    global _llm_client
+
+    if _llm_client is None:
+        _llm_client = get_llm_client(LLM_BACKEND)
+
+    return _llm_client
+
+# CONCURRENCY
+# Blocking stages run on a bounded thread pool so the event loop keeps
+# serving other requests; each stage has its own concurrency limit.
+# Generation is an async call and only needs the limit.
+
+INFERENCE_THREADS = 4
+STAGE_CONCURRENCY = {
+    "embed": 4,
+    "retrieval": 8,
+    "rerank": 2,
+    "generation": 32
+}
+
+stages = StagePool(INFERENCE_THREADS, STAGE_CONCURRENCY)
+
+# MICRO-BATCHING
+# Concurrent requests are collected for up to *_BATCH_WAIT_MS and run
+# as one forward pass; raise the wait / size for throughput, lower it
+# for latency
+
+EMBED_BATCH_SIZE = 32
+EMBED_BATCH_WAIT_MS = 5
+RERANK_BATCH_SIZE = 16   # requests per cross-encoder pass
+RERANK_BATCH_WAIT_MS = 5
+
+embed_batcher = MicroBatcher(
+    lambda queries: list(encode_queries(queries)),
+    lambda fn, items: stages.run("embed", fn, items),
+    max_batch_size=EMBED_BATCH_SIZE,
+    max_wait_ms=EMBED_BATCH_WAIT_MS
+)
+
+rerank_batcher = MicroBatcher(
+    flatten_batches(rerank),
+    lambda fn, items: stages.run("rerank", fn, items),
+    max_batch_size=RERANK_BATCH_SIZE,
+    max_wait_ms=RERANK_BATCH_WAIT_MS
+)
+
+# INGESTION JOBS
+# /upload only saves the file and queues a job; parsing, chunking,
+# embedding and storing run on this worker pool (poll /jobs/{id})
+
+INGEST_WORKERS = 2
+PARSE_PROCESSES = os.cpu_count()   # per batch upload
+PDF_BACKEND = "pymupdf"            # or "pypdf" (see pdf_benchmark.py)
+PDF_WORKERS = os.cpu_count()       # page-range processes for one large PDF
+
+jobs = JobManager(max_workers=INGEST_WORKERS)
+
+
+def ingestion_for(collection) -> IngestionPipeline:
+    return IngestionPipeline(
+        embedding_pipeline,
+        collection,
+        pdf_backend=PDF_BACKEND,
+        pdf_workers=PDF_WORKERS
+    )
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    stages.shutdown()
+    jobs.shutdown()
+    collections.close()
+    profiles.shutdown()
+
+# STARTUP
+# Importing main loads no model, so the server starts in seconds. The
+# warm-up then loads the models, runs a dummy encode and rerank (the
+# first forward pass pays for torch's lazy initialisation), opens the
+# default collection and builds the LLM client on a background thread,
+# retrying failed steps with backoff. /healthz answers as soon as the
+# process is up; /readyz returns 503 until the warm-up is done, so
+# autoscaled replicas only get traffic once a query will not pay the
+# cold start. If the warm-up gives up, /healthz fails too, so the
+# orchestrator restarts the replica instead of leaving it unready
+# forever. Import cost per module: python startup_report.py
+
+
+def warm_up_collection():
+    collection = collections.get(DEFAULT_COLLECTION)
+
+    if collection.ntotal > 0:
+        collection.search(top_k=1, query_embedding=encode_queries(["warm up"])[0])
+
+
+warmup = WarmUp([
+    ("embedding_model", lambda: encode_queries(["warm up"])),
+    ("reranker", lambda: rerank([["warm up", "warm up"]])),
+    ("collection", warm_up_collection),
+    ("llm_client", llm)
+])
+
+started_at = time.time()
+
+
+@app.on_event("startup")
+def start_warm_up():
+    warmup.start()
+
+
+@app.get("/healthz")
+def healthz():
+
+    uptime_s = round(time.time() - started_at, 1)
+
+    if warmup.failed:
+        return JSONResponse(status_code=503, content={"status": "warm-up failed", "uptime_s": uptime_s, **warmup.status()})
+
+    return {"status": "ok", "uptime_s": uptime_s}
+
+
+@app.get("/readyz")
+def readyz():
+
+    status = warmup.status()
+
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+
+    return status
 
 # CACHES
+# Bounded LRU caches, one retrieval / response pair per collection;
+# the response cache also answers semantically similar queries
+# (cosine ≥ SEMANTIC_CACHE_THRESHOLD) with one matrix lookup. Query
+# embeddings do not depend on the collection and are shared.
+
+CACHE_SIZE = 1024
+CACHE_TTL_SECONDS = 3600
+SEMANTIC_CACHE_THRESHOLD = 0.90
+
+query_embedding_cache = LRUCache(CACHE_SIZE)
+
+collection_caches = {}
+cache_lock = threading.Lock()
+
+
+def caches_for(name: str) -> dict:
+
+    caches = collection_caches.get(name)
+
+    if caches is None:
+        with cache_lock:
+            caches = collection_caches.setdefault(name, {
+                "retrieval": LRUCache(CACHE_SIZE, ttl_seconds=CACHE_TTL_SECONDS),
+                "response": SemanticCache(
+                    CACHE_SIZE,
+                    ttl_seconds=CACHE_TTL_SECONDS,
+                    threshold=SEMANTIC_CACHE_THRESHOLD
+                )
+            })
+
+    return caches
+
+# CACHE INVALIDATION
+# Retrieval and response entries are tagged with the store generation
+# they were computed at, the sources of all RETRIEVAL_K candidates, the
+# query embedding, the lowest dense score in the candidate list and,
+# with hybrid retrieval, all of the query's keyword terms. New chunks
+# only invalidate entries whose query scores at least that floor
+# against one of them, or that contain any of the query's terms (the
+# BM25 side ORs every term, so such a chunk could have become a
+# candidate); a delete only those built from the deleted source. Query
+# embeddings never go stale and are not invalidated.
+
+def cache_tags(query: str, query_embedding, candidates: list, dense_floor: float, collection, generation: int) -> dict:
+    return {
+        "collection": collection.name,
+        "generation": generation,
+        "sources": frozenset(doc["source"] for doc in candidates),
+        "query_embedding": np.asarray(query_embedding, dtype="float32").reshape(-1),
+        "floor": dense_floor,
+        "terms": frozenset(keyword_terms(query)) if HYBRID_RETRIEVAL else frozenset()
+    }
+
+
+def cache_put(cache, tags: dict, *args):
+    """
+    Cache an entry unless the store changed while it was computed.
+    """
+    with cache_lock:
+        if tags is not None and tags["generation"] == collections.get(tags["collection"]).generation:
+            cache.put(*args, tags=tags)
+
+
+def invalidate_caches(change: dict):
+
+    # Lowercased once per change, not once per cached entry
+    texts = [text.lower() for text in change["texts"] or []]
+
+    def stale(tags):
+        # Computed after the change was already visible
+        if tags["generation"] >= change["generation"]:
+            return False
+
+        if change["deleted"]:
+            return bool(tags["sources"] & change["sources"])
+
+        sims = change["embeddings"] @ tags["query_embedding"]
+        if float(sims.max()) >= tags["floor"]:
+            return True
+
+        return any(term in text for text in texts for term in tags["terms"])
+
+    def affected(tags):
+        if stale(tags):
+            return True
+
+        # Unaffected entries are as good as ones computed now: re-stamp
+        # them, or a response built from a surviving retrieval entry
+        # would fail cache_put's generation check until it is evicted
+        tags["generation"] = max(tags["generation"], change["generation"])
+        return False
+
+    caches = caches_for(change["collection"])
+
+    with cache_lock:
+        n_invalidated = caches["retrieval"].invalidate(affected) + caches["response"].invalidate(affected)
+
+    print(f"[INFO] {change['collection']} generation {change['generation']}: invalidated {n_invalidated} cache entries")
+
+
+collections.listeners.append(invalidate_caches)
+
+
+def get_collection(name: str, create: bool = False):
+    try:
+        return collections.get(name, create=create)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Collection not found: {name}")
+
 
-retrieval_cache = {}
-response_cache = {}
-query_embedding_cache = {}
+def upload_dir(collection) -> str:
+    # The default collection keeps using data/ directly
+    if collection.name == DEFAULT_COLLECTION:
+        return UPLOAD_DIR
+
+    path = os.path.join(UPLOAD_DIR, collection.name)
+    os.makedirs(path, exist_ok=True)
+    return path
 
 # UTILITY FUNCTIONS
 
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+def check_semantic_cache(response_cache, query_emb):
+
+    match = response_cache.lookup(query_emb)
 
+    if match is None:
+        return None
 
-def print_latency(embed=0, retrieval=0, rerank=0, generation=0, total=0):
+    cached_query, cached_response, similarity = match
 
-    print("\n----- LATENCY BREAKDOWN -----")
-    print(f"Embedding  → {embed:.2f} ms")
-    print(f"Retrieval  → {retrieval:.2f} ms")
-    print(f"Reranking  → {rerank:.2f} ms")
-    print(f"Generation → {generation:.2f} ms")
-    print(f"Total      → {total:.2f} ms")
-    print("-----------------------------\n")
+    print(f"[SEMANTIC CACHE HIT] Similar to: {cached_query} ({similarity:.3f})")
 
+    return cached_response
 
-def check_semantic_cache(query_emb):
 
-    for cached_query, cached_emb in query_embedding_cache.items():
+async def embed_query(query: str):
 
-        sim = cosine_similarity(query_emb, cached_emb)
+    with tracer.span("embed") as span:
+        query_embedding = query_embedding_cache.get(query)
+        span.set(cached=query_embedding is not None)
 
-        if sim > 0.90:
-            print(f"[SEMANTIC CACHE HIT] Similar to: {cached_query}")
-            return cached_query
+        if query_embedding is None:
+            query_embedding = await embed_batcher.submit(query)
+            query_embedding_cache.put(query, query_embedding)
 
-    return None
+    return query_embedding
 
 
 # HOME ROUTE
@@ -87,81 +394,425 @@ def home(request: Request):
 # FILE UPLOAD
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), collection: str = DEFAULT_COLLECTION):
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    target = get_collection(collection, create=True)
+    file_path = os.path.join(upload_dir(target), file.filename)
 
     with open(file_path, "wb") as f:
         f.write(await file.read())
 
     print("[INFO] File uploaded:", file.filename)
 
-    loader = DataLoader()
-    documents = loader.load_file(file_path)
+    job = jobs.submit(
+        f"{target.name}/{file.filename}",
+        STREAM_STAGES,
+        ingestion_for(target).ingest_file_streaming,
+        file_path
+    )
 
-    chunks = embedding_pipeline.chunk_documents(documents)
-    embeddings = embedding_pipeline.embed_chunks(chunks)
+    return {
+        "message": "File uploaded, ingestion queued.",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
 
-    vector_store.store(
-        embeddings.astype("float32"),
-        [
-            {
-                "text": c.page_content,
-                "page": c.metadata.get("page", "Unknown"),
-                "source": c.metadata.get("source_file", file.filename)
-            }
-            for c in chunks
-        ]
+
+@app.post("/upload/batch")
+async def upload_files(files: List[UploadFile] = File(...), collection: str = DEFAULT_COLLECTION):
+
+    target = get_collection(collection, create=True)
+    file_paths = []
+
+    for file in files:
+        file_path = os.path.join(upload_dir(target), file.filename)
+
+        with open(file_path, "wb") as f:
+            f.write(await file.read())
+
+        file_paths.append(file_path)
+
+    print(f"[INFO] {len(file_paths)} files uploaded")
+
+    job = jobs.submit(
+        f"{target.name}: batch of {len(file_paths)} files",
+        INGEST_STAGES,
+        ingestion_for(target).ingest_files,
+        file_paths,
+        max_workers=PARSE_PROCESSES
     )
 
-    vector_store.load()
+    return {
+        "message": f"{len(file_paths)} files uploaded, ingestion queued.",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+# DOCUMENT DELETE
+# Chunks are tombstoned and disappear from search immediately; their
+# vectors are dropped by the next (background) compaction.
+# Re-uploading a file with the same name replaces it the same way,
+# deleting only the chunks the new revision no longer contains.
+
+@app.delete("/documents/{source}")
+def delete_document(source: str, collection: str = DEFAULT_COLLECTION):
+
+    target = get_collection(collection)
+    deleted = target.delete_source(source)
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    file_path = os.path.join(upload_dir(target), os.path.basename(source))
+    if os.path.exists(file_path):
+        os.remove(file_path)
 
-    retrieval_cache.clear()
-    response_cache.clear()
-    query_embedding_cache.clear()
+    return {"source": source, "collection": target.name, "chunks_deleted": deleted}
 
-    print("[INFO] FAISS index created and loaded")
-    print("[INFO] Cache cleared after upload")
 
+# COLLECTIONS
+
+@app.get("/collections")
+def list_collections():
+    return {"collections": collections.names()}
+
+
+@app.post("/collections/{name}")
+def create_collection(name: str, shards: int = 1):
+
+    if shards < 1:
+        raise HTTPException(status_code=400, detail="shards must be ≥ 1")
+
+    if collections.exists(name):
+        raise HTTPException(status_code=409, detail=f"Collection already exists: {name}")
+
+    try:
+        target = collections.get(name, shards=shards)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"collection": target.name, "shards": len(target.shards)}
+
+
+# JOB STATUS
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+
+    job = jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job.to_dict()
+
+
+# CACHE STATS
+
+@app.get("/cache/stats")
+def cache_stats():
     return {
-        "message": "File uploaded, embeddings created, FAISS index ready.",
-        "chunks": len(chunks)
+        "collections": {
+            name: {
+                "response": caches["response"].stats(),
+                "retrieval": caches["retrieval"].stats(),
+                "index_generation": collections.get(name).generation
+            }
+            for name, caches in list(collection_caches.items())
+        },
+        "query_embedding": query_embedding_cache.stats(),
+        "chunk_embedding": embedding_cache.stats(),
+        "batching": {
+            "embed": embed_batcher.stats(),
+            "rerank": rerank_batcher.stats()
+        }
+    }
+
+
+# METRICS
+# Prometheus text format on /metrics:
+#   rag_stage_latency_seconds{endpoint, stage, cache}  histograms of
+#       embed / retrieval / rerank / generation / total; cache is the
+#       response cache result ("miss", "exact", "semantic") or
+#       "retrieval" when the retrieval cache answered
+#   rag_cache_lookups_total, rag_cache_entries, rag_cache_invalidated_total
+#   rag_index_vectors / _deleted_vectors / _segments / _generation
+#   rag_chunk_embedding_* / rag_embedded_chunks_total  ingestion throughput
+#   rag_requests_in_flight{endpoint}, rag_stage_waiting / _running{stage}
+
+def metrics_cache_stats() -> dict:
+
+    stats = {
+        name: {"response": caches["response"].stats(), "retrieval": caches["retrieval"].stats()}
+        for name, caches in list(collection_caches.items())
+    }
+
+    # Shared by all collections
+    stats[""] = {
+        "query_embedding": query_embedding_cache.stats(),
+        "chunk_embedding": embedding_cache.stats()
     }
 
+    return stats
+
+
+register_collector(StatsCollector(
+    metrics_cache_stats,
+    lambda: {collection.name: collection.stats() for collection in collections.opened()},
+    stages
+))
+
+
+@app.get("/metrics")
+def metrics():
+    content, content_type = render()
+    return Response(content=content, media_type=content_type)
+
+
+# REQUEST TRACKING
+# Every request to these endpoints is counted in flight and is one
+# trace (returned in X-Trace-Id); ingestion jobs are traces of their
+# own (trace_id in /jobs/{id}). Spans cover cache lookups, embedding,
+# FAISS, BM25, chunk store reads, shard fan-out, reranking, the LLM
+# call and the ingestion stages. TRACE_EXPORT=jsonl and/or otlp
+# exports them (src/tracing.py); recent traces are on /admin/traces.
+#
+# With PROFILING_ENABLED=1, POST /admin/profiling?fraction=0.05 runs
+# that share of requests under the shared sampling profiler, at most
+# MAX_PROFILED_REQUESTS at a time (X-Profile-Id header); the folded
+# stacks (flamegraph.pl / speedscope input) are served from
+# /admin/profiles/{id} and written to profiles/ off the event loop.
+# Without the flag profiling cannot be switched on.
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+MAX_PROFILED_REQUESTS = 4
+
+TRACKED_ENDPOINTS = {
+    "/search": "search",
+    "/search/stream": "search_stream",
+    "/search/batch": "search_batch",
+    "/upload": "upload",
+    "/upload/batch": "upload_batch"
+}
+
+profiles = ProfileManager("profiles", max_open=MAX_PROFILED_REQUESTS)
+
+
+class TrackRequests:
+    """
+    ASGI middleware: in-flight gauge, root span and optional profile
+    per tracked request. Everything is released in one finally around
+    the whole request, response body included, so a client that
+    disconnects before or during a stream cannot leak the gauge, the
+    open trace or a profiler slot.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+
+        endpoint = TRACKED_ENDPOINTS.get(scope["path"]) if scope["type"] == "http" else None
+
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        gauge = REQUESTS_IN_FLIGHT.labels(endpoint)
+        gauge.inc()
+
+        root = tracer.start_trace(f"{scope['method']} {scope['path']}", endpoint=endpoint)
+        token = tracer.activate(root)
+        profile = profiles.maybe_start()
+        finished = False
+
+        def finish(error: str = None):
+            nonlocal finished
+
+            if finished:
+                return
+            finished = True
+
+            gauge.dec()
+
+            if profile is not None:
+                profiles.finish(root.trace_id, profile, endpoint=endpoint)
+
+            root.end(error)
+
+        async def send_tracked(message):
+            if message["type"] == "http.response.start":
+                root.set(status=message["status"])
+
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Trace-Id", root.trace_id)
+
+                if profile is not None:
+                    headers.append("X-Profile-Id", root.trace_id)
+
+            await send(message)
+
+        error = None
+
+        # Streamed answers stay in flight (and in the trace) until the
+        # last event is sent or the client goes away
+        try:
+            await self.app(scope, receive, send_tracked)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            tracer.deactivate(token)
+            finish(error)
+
+
+app.add_middleware(TrackRequests)
+
+
+@app.get("/admin/traces")
+def list_traces(limit: int = 50):
+    return tracer.recent(limit)
+
+
+@app.get("/admin/traces/{trace_id}")
+def get_trace(trace_id: str):
+
+    spans = tracer.get_trace(trace_id)
+
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found (only recent traces are kept)")
+
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@app.get("/admin/profiling")
+def profiling_status():
+    return {**profiles.status(), "available": PROFILING_ENABLED, "profiles": profiles.list()}
+
+
+@app.post("/admin/profiling")
+def configure_profiling(fraction: float, interval_ms: Optional[float] = None):
+
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (start the server with PROFILING_ENABLED=1)")
+
+    try:
+        profiles.configure(fraction, interval_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return profiles.status()
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str):
+
+    folded = profiles.get(profile_id)
+
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return Response(content=folded, media_type="text/plain")
+
 
 # QUERY MODEL
 
-class QueryRequest(BaseModel):
+class SearchFilters(BaseModel):
+    # Optional filters, applied inside the index search
+    sources: Optional[List[str]] = None
+    page_min: Optional[int] = None
+    page_max: Optional[int] = None
+
+    def filters(self) -> dict:
+        return {
+            key: value
+            for key, value in (("sources", self.sources), ("page_min", self.page_min), ("page_max", self.page_max))
+            if value is not None
+        }
+
+
+class QueryRequest(SearchFilters):
     query: str
+    collection: str = DEFAULT_COLLECTION
+
+
+class BatchQueryRequest(SearchFilters):
+    queries: List[str]
+    collection: str = DEFAULT_COLLECTION
 
 
 # RETRIEVE + RERANK
 
-def retrieve_and_rerank(query: str, top_k: int):
+def retrieval_cache_key(query: str, top_k: int, filters: dict) -> str:
+    return f"{query}_{top_k}_{json.dumps(filters, sort_keys=True)}" if filters else f"{query}_{top_k}"
 
-    cache_key = f"{query}_{top_k}"
 
-    if cache_key in retrieval_cache:
+async def retrieve_and_rerank(query: str, top_k: int, collection, query_embedding=None, filters: dict = None):
+
+    retrieval_cache = caches_for(collection.name)["retrieval"]
+
+    filters = filters or {}
+    cache_key = retrieval_cache_key(query, top_k, filters)
+
+    with tracer.span("cache.retrieval") as span:
+        cached_results = retrieval_cache.get(cache_key)
+        span.set(hit=cached_results is not None)
+
+    if cached_results is not None:
         print("[CACHE HIT] Retrieval")
-        return retrieval_cache[cache_key], 0, 0
+        return cached_results, retrieval_cache.tags(cache_key), 0, 0
+
+    if collection.ntotal == 0:
+        return [], None, 0, 0
 
-    if not vector_store.index:
-        return [], 0, 0
+    generation = collection.generation
 
     retrieval_start = time.perf_counter()
 
-    results = vector_store.search(query, top_k=RETRIEVAL_K)
+    with tracer.span("retrieval", hybrid=HYBRID_RETRIEVAL, top_k=RETRIEVAL_K, filtered=bool(filters)) as span:
+        if HYBRID_RETRIEVAL:
+            results, dense_floor = await stages.run(
+                "retrieval",
+                collection.hybrid_search,
+                query,
+                top_k=RETRIEVAL_K,
+                candidates=HYBRID_CANDIDATES,
+                query_embedding=query_embedding,
+                **filters
+            )
+
+        else:
+            results = await stages.run(
+                "retrieval",
+                collection.search,
+                query,
+                top_k=RETRIEVAL_K,
+                query_embedding=query_embedding,
+                **filters
+            )
+            dense_floor = results[-1]["score"] if len(results) >= RETRIEVAL_K else -np.inf
+
+        span.set(results=len(results))
 
     retrieval_time = (time.perf_counter() - retrieval_start) * 1000
 
     if not results:
-        return [], retrieval_time, 0
+        return [], None, retrieval_time, 0
+
+    tags = (
+        cache_tags(query, query_embedding, results, dense_floor, collection, generation)
+        if query_embedding is not None else None
+    )
 
     rerank_start = time.perf_counter()
 
     pairs = [[query, doc["text"]] for doc in results]
 
-    scores = reranker.predict(pairs, batch_size=16)
+    with tracer.span("rerank", pairs=len(pairs)):
+        scores = await rerank_batcher.submit(pairs)
 
     for doc, score in zip(results, scores):
         doc["rerank_score"] = float(score)
@@ -176,81 +827,98 @@ def retrieve_and_rerank(query: str, top_k: int):
 
     rerank_time = (time.perf_counter() - rerank_start) * 1000
 
-    retrieval_cache[cache_key] = final_results
+    cache_put(retrieval_cache, tags, cache_key, final_results)
 
-    return final_results, retrieval_time, rerank_time
+    return final_results, tags, retrieval_time, rerank_time
 
 
-# SEARCH ROUTE
+# QUERY PREPARATION (shared by /search and /search/stream)
 
-@app.post("/search")
-async def search_documents(request: QueryRequest):
+async def prepare_query(query: str, total_start: float, collection, filters: dict = None, endpoint: str = "search") -> dict:
+    """
+    Cache checks → embed → retrieve → rerank.
 
-    total_start = time.perf_counter()
+    Returns a dict with either "response" (cache hit or early answer,
+    nothing left to generate) or the reranked "results" plus stage
+    timings for the generation step.
 
-    query = request.query.strip().lower()
+    Filtered queries skip the response cache, whose entries (and
+    semantic matches) are answers over the whole corpus; their
+    retrieval results are still cached per filter.
+    """
 
-    # EMBEDDING TIMER
+    response_cache = caches_for(collection.name)["response"]
 
-    embed_start = time.perf_counter()
+    # EXACT CACHE (no embedding needed)
 
-    query_embedding = query_embedder.encode(query)
+    with tracer.span("cache.exact") as span:
+        cached_response = response_cache.get(query) if not filters else None
+        span.set(hit=cached_response is not None)
 
-    embed_time = (time.perf_counter() - embed_start) * 1000
+    if cached_response is not None:
 
-    # SEMANTIC CACHE CHECK
+        total_time = (time.perf_counter() - total_start) * 1000
 
-    similar_query = check_semantic_cache(query_embedding)
+        print("[CACHE HIT] Exact Response")
 
-    if similar_query and similar_query in response_cache:
+        observe_stages(endpoint, "exact", total=total_time)
 
-        total_time = (time.perf_counter() - total_start) * 1000
+        return {"response": cached_response, "cached": True}
 
-        print("[CACHE HIT] Semantic Response")
+    # EMBEDDING TIMER
 
-        print_latency(
-            embed_time,
-            0,
-            0,
-            0,
-            total_time
-        )
+    embed_start = time.perf_counter()
 
-        return response_cache[similar_query]
+    query_embedding = await embed_query(query)
 
-    # EXACT CACHE
+    embed_time = (time.perf_counter() - embed_start) * 1000
 
-    if query in response_cache:
+    # SEMANTIC CACHE CHECK
+
+    with tracer.span("cache.semantic") as span:
+        cached_response = check_semantic_cache(response_cache, query_embedding) if not filters else None
+        span.set(hit=cached_response is not None)
+
+    if cached_response is not None:
 
         total_time = (time.perf_counter() - total_start) * 1000
 
-        print("[CACHE HIT] Exact Response")
+        print("[CACHE HIT] Semantic Response")
 
-        print_latency(
-            embed_time,
-            0,
-            0,
-            0,
-            total_time
-        )
+        observe_stages(endpoint, "semantic", embed=embed_time, total=total_time)
 
-        return response_cache[query]
+        return {"response": cached_response, "cached": True}
 
-    if not vector_store.index:
-        return {"answer": "Please upload a document first."}
+    if collection.ntotal == 0:
+        return {"response": {"answer": "Please upload a document first."}, "cached": False}
 
     # RETRIEVE + RERANK
 
-    results, retrieval_time, rerank_time = retrieve_and_rerank(
+    results, tags, retrieval_time, rerank_time = await retrieve_and_rerank(
         query,
-        RERANK_TOP_K
+        RERANK_TOP_K,
+        collection,
+        query_embedding=query_embedding,
+        filters=filters
     )
 
     if not results:
-        return {"answer": "No relevant information found."}
+        return {"response": {"answer": "No relevant information found."}, "cached": False}
+
+    return {
+        "response": None,
+        "endpoint": endpoint,
+        "collection": collection,
+        "query_embedding": query_embedding,
+        "results": results,
+        "cache_tags": tags if not filters else None,
+        "embed_time": embed_time,
+        "retrieval_time": retrieval_time,
+        "rerank_time": rerank_time
+    }
 
-   
-    # BUILD CONTEXT
+
+def build_prompt(query: str, results: list) -> str:
 
     context = ""
 
@@ -278,46 +946,421 @@ Question:
 Answer:
 """
 
-    # GENERATION TIMER
+    return prompt
+
+
+async def generate_answer(prompt: str):
+    """
+    One LLM completion under the generation limit. Returns
+    (answer, generation ms).
+    """
 
     gen_start = time.perf_counter()
 
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
+    with tracer.span("llm.generate", backend=LLM_BACKEND, prompt_chars=len(prompt)) as span:
+        async with stages.limit("generation"):
+            response = await llm().chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
+
+        answer = response.choices[0].message.content.strip()
+        span.set(answer_chars=len(answer))
 
     gen_time = (time.perf_counter() - gen_start) * 1000
 
-    final_answer = response.choices[0].message.content.strip()
+    return answer, gen_time
+
+
+def finish_search(query: str, prepared: dict, final_answer: str, gen_time: float, total_start: float) -> dict:
+    """
+    Build the response, record the stage latencies and fill the
+    response cache.
+    """
 
     total_time = (time.perf_counter() - total_start) * 1000
 
-    # PRINT LATENCY
+    # RECORD LATENCY
 
-    print_latency(
-        embed_time,
-        retrieval_time,
-        rerank_time,
-        gen_time,
-        total_time
-    )
+    if prepared["retrieval_time"] == 0:
+        # Retrieval cache hit: retrieval and rerank did not run
+        observe_stages(
+            prepared["endpoint"], "retrieval",
+            embed=prepared["embed_time"], generation=gen_time, total=total_time
+        )
+    else:
+        observe_stages(
+            prepared["endpoint"],
+            embed=prepared["embed_time"],
+            retrieval=prepared["retrieval_time"],
+            rerank=prepared["rerank_time"],
+            generation=gen_time,
+            total=total_time
+        )
 
     result = {
         "question": query,
         "answer": final_answer,
-        "sources": results,
+        "sources": prepared["results"],
         "latency": {
-            "embedding_ms": round(embed_time,2),
-            "retrieval_ms": round(retrieval_time,2),
-            "rerank_ms": round(rerank_time,2),
+            "embedding_ms": round(prepared["embed_time"],2),
+            "retrieval_ms": round(prepared["retrieval_time"],2),
+            "rerank_ms": round(prepared["rerank_time"],2),
             "generation_ms": round(gen_time,2),
             "total_ms": round(total_time,2)
         }
     }
 
-    response_cache[query] = result
-    query_embedding_cache[query] = query_embedding
+    cache_put(
+        caches_for(prepared["collection"].name)["response"],
+        prepared["cache_tags"],
+        query,
+        prepared["query_embedding"],
+        result
+    )
+
+    return result
+
+
+# SEARCH ROUTE
+
+@app.post("/search")
+async def search_documents(request: QueryRequest):
+
+    total_start = time.perf_counter()
+
+    query = request.query.strip().lower()
+
+    collection = get_collection(request.collection)
+
+    prepared = await prepare_query(query, total_start, collection, request.filters())
+
+    if prepared["response"] is not None:
+        return {**prepared["response"], "cached": prepared["cached"]}
+
+    prompt = build_prompt(query, prepared["results"])
+
+    final_answer, gen_time = await generate_answer(prompt)
+
+    result = finish_search(query, prepared, final_answer, gen_time, total_start)
+
+    return {**result, "cached": False}
+
+
+# BATCH SEARCH ROUTE
+# Each stage runs once for the whole batch instead of once per query:
+# one encode call for the queries not in the embedding cache, one
+# matrix search, one cross-encoder predict over every (query, chunk)
+# pair, then all LLM calls concurrently. Cache hits and duplicate
+# queries skip the later stages. Returns per-query results in request
+# order plus one latency breakdown for the batch.
+
+MAX_BATCH_QUERIES = 64
+
+
+@app.post("/search/batch")
+async def search_documents_batch(request: BatchQueryRequest):
+
+    total_start = time.perf_counter()
+
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries given")
+
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+
+    queries = [query.strip().lower() for query in request.queries]
+    unique = list(dict.fromkeys(queries))
+
+    collection = get_collection(request.collection)
+    filters = request.filters()
+
+    caches = caches_for(collection.name)
+    response_cache = caches["response"]
+    retrieval_cache = caches["retrieval"]
+
+    answers = {}   # query → per-query result
+
+    # EXACT CACHE
+
+    for query in unique:
+        cached_response = response_cache.get(query) if not filters else None
+        if cached_response is not None:
+            answers[query] = {**cached_response, "cached": True}
+
+    # EMBEDDING (one encode call)
+
+    embed_start = time.perf_counter()
+
+    embeddings = {}
+
+    for query in unique:
+        if query not in answers:
+            query_embedding = query_embedding_cache.get(query)
+            if query_embedding is not None:
+                embeddings[query] = query_embedding
+
+    to_encode = [query for query in unique if query not in answers and query not in embeddings]
 
-    return result
\ No newline at end of file
+    if to_encode:
+        with tracer.span("embed", queries=len(to_encode)):
+            encoded = await stages.run("embed", encode_queries, to_encode)
+
+        for query, query_embedding in zip(to_encode, encoded):
+            embeddings[query] = query_embedding
+            query_embedding_cache.put(query, query_embedding)
+
+    embed_time = (time.perf_counter() - embed_start) * 1000
+
+    # SEMANTIC CACHE
+
+    for query in embeddings:
+        cached_response = check_semantic_cache(response_cache, embeddings[query]) if not filters else None
+        if cached_response is not None:
+            answers[query] = {**cached_response, "question": query, "cached": True}
+
+    n_cached = len(answers)
+    pending = [query for query in unique if query not in answers]
+
+    if pending and collection.ntotal == 0:
+        for query in pending:
+            answers[query] = {"question": query, "answer": "Please upload a document first.", "sources": [], "cached": False}
+        pending = []
+
+    # RETRIEVAL (one matrix search)
+
+    retrieval_start = time.perf_counter()
+
+    retrieved = {}   # query → (reranked results, cache tags)
+
+    for query in pending:
+        key = retrieval_cache_key(query, RERANK_TOP_K, filters)
+        cached_results = retrieval_cache.get(key)
+        if cached_results is not None:
+            retrieved[query] = (cached_results, retrieval_cache.tags(key))
+
+    to_search = [query for query in pending if query not in retrieved]
+    searched = []
+
+    if to_search:
+        generation = collection.generation
+        query_matrix = np.stack([np.asarray(embeddings[query], dtype="float32").reshape(-1) for query in to_search])
+
+        with tracer.span("retrieval", hybrid=HYBRID_RETRIEVAL, top_k=RETRIEVAL_K, queries=len(to_search), filtered=bool(filters)):
+            if HYBRID_RETRIEVAL:
+                searched = await stages.run(
+                    "retrieval",
+                    collection.hybrid_search_batch,
+                    to_search,
+                    top_k=RETRIEVAL_K,
+                    candidates=HYBRID_CANDIDATES,
+                    query_embeddings=query_matrix,
+                    **filters
+                )
+
+            else:
+                result_lists = await stages.run(
+                    "retrieval",
+                    collection.search_batch,
+                    to_search,
+                    top_k=RETRIEVAL_K,
+                    query_embeddings=query_matrix,
+                    **filters
+                )
+                searched = [
+                    (results, results[-1]["score"] if len(results) >= RETRIEVAL_K else -np.inf)
+                    for results in result_lists
+                ]
+
+    retrieval_time = (time.perf_counter() - retrieval_start) * 1000
+
+    # RERANK (one predict over every query's candidates)
+
+    rerank_start = time.perf_counter()
+
+    pairs = [[query, doc["text"]] for query, (results, _) in zip(to_search, searched) for doc in results]
+
+    scores = []
+
+    if pairs:
+        with tracer.span("rerank", pairs=len(pairs)):
+            scores = await stages.run("rerank", rerank, pairs)
+
+    offset = 0
+
+    for query, (results, dense_floor) in zip(to_search, searched):
+
+        for doc, score in zip(results, scores[offset:offset + len(results)]):
+            doc["rerank_score"] = float(score)
+
+        offset += len(results)
+
+        if not results:
+            retrieved[query] = ([], None)
+            continue
+
+        final_results = sorted(results, key=lambda x: x["rerank_score"], reverse=True)[:RERANK_TOP_K]
+
+        tags = cache_tags(query, embeddings[query], results, dense_floor, collection, generation)
+        cache_put(retrieval_cache, tags, retrieval_cache_key(query, RERANK_TOP_K, filters), final_results)
+
+        retrieved[query] = (final_results, tags)
+
+    rerank_time = (time.perf_counter() - rerank_start) * 1000
+
+    # GENERATION (concurrent)
+
+    for query in pending:
+        if not retrieved[query][0]:
+            answers[query] = {"question": query, "answer": "No relevant information found.", "sources": [], "cached": False}
+
+    to_generate = [query for query in pending if query not in answers]
+
+    gen_start = time.perf_counter()
+
+    generated = await asyncio.gather(*(
+        generate_answer(build_prompt(query, retrieved[query][0]))
+        for query in to_generate
+    ))
+
+    gen_time = (time.perf_counter() - gen_start) * 1000
+
+    for query, (final_answer, query_gen_time) in zip(to_generate, generated):
+
+        results, tags = retrieved[query]
+
+        result = {
+            "question": query,
+            "answer": final_answer,
+            "sources": results,
+            "latency": {"generation_ms": round(query_gen_time, 2)}
+        }
+
+        cache_put(response_cache, tags if not filters else None, query, embeddings[query], result)
+
+        answers[query] = {**result, "cached": False}
+
+    total_time = (time.perf_counter() - total_start) * 1000
+
+    print(f"[INFO] Batch of {len(queries)} queries ({len(unique)} unique, {n_cached} cached)")
+
+    observe_stages(
+        "search_batch",
+        embed=embed_time,
+        retrieval=retrieval_time,
+        rerank=rerank_time,
+        generation=gen_time,
+        total=total_time
+    )
+
+    return {
+        "results": [answers[query] for query in queries],
+        "latency": {
+            "queries": len(queries),
+            "unique_queries": len(unique),
+            "cache_hits": n_cached,
+            "encoded": len(to_encode),
+            "searched": len(to_search),
+            "reranked_pairs": len(pairs),
+            "generated": len(to_generate),
+            "embedding_ms": round(embed_time, 2),
+            "retrieval_ms": round(retrieval_time, 2),
+            "rerank_ms": round(rerank_time, 2),
+            "generation_ms": round(gen_time, 2),
+            "total_ms": round(total_time, 2)
+        }
+    }
+
+
+# STREAMING SEARCH ROUTE (Server-Sent Events)
+#
+#   event: sources → reranked chunks, sent before generation starts
+#   event: token   → {"text": ...} answer deltas as the LLM produces them
+#   event: done    → {"latency": {...}} final breakdown
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/search/stream")
+async def search_documents_stream(request: QueryRequest):
+
+    total_start = time.perf_counter()
+
+    query = request.query.strip().lower()
+
+    collection = get_collection(request.collection)
+
+    prepared = await prepare_query(query, total_start, collection, request.filters(), endpoint="search_stream")
+
+    async def event_stream():
+
+        # Cache hit / early answer → replay it as one token
+        if prepared["response"] is not None:
+
+            cached = prepared["response"]
+            total_time = (time.perf_counter() - total_start) * 1000
+
+            yield sse_event("sources", cached.get("sources", []))
+            yield sse_event("token", {"text": cached["answer"]})
+            yield sse_event("done", {
+                "cached": prepared["cached"],
+                "latency": {"total_ms": round(total_time, 2)}
+            })
+            return
+
+        yield sse_event("sources", prepared["results"])
+
+        prompt = build_prompt(query, prepared["results"])
+
+        # GENERATION TIMER
+
+        gen_start = time.perf_counter()
+        first_token_time = None
+        answer_parts = []
+
+        with tracer.span("llm.stream", backend=LLM_BACKEND, prompt_chars=len(prompt)) as span:
+            async with stages.limit("generation"):
+                stream = await llm().chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    stream=True
+                )
+
+                async for chunk in stream:
+
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+
+                    if not delta:
+                        continue
+
+                    if first_token_time is None:
+                        first_token_time = (time.perf_counter() - total_start) * 1000
+
+                    answer_parts.append(delta)
+                    yield sse_event("token", {"text": delta})
+
+            span.set(first_token_ms=round(first_token_time, 2) if first_token_time else None, answer_chars=sum(map(len, answer_parts)))
+
+        gen_time = (time.perf_counter() - gen_start) * 1000
+
+        result = finish_search(
+            query,
+            prepared,
+            "".join(answer_parts).strip(),
+            gen_time,
+            total_start
+        )
+
+        latency = dict(result["latency"])
+        latency["first_token_ms"] = round(first_token_time or latency["total_ms"], 2)
+
+        yield sse_event("done", {"cached": False, "latency": latency})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
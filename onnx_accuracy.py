@@ -0,0 +1,222 @@
+"""
+Accuracy + speed check of an ONNX inference backend against PyTorch.
+
+Embeddings: cosine similarity between the backend's and PyTorch's
+vectors for the same texts must stay above --min-cosine.
+Reranking: for each query, the backend's rerank order must keep the
+same top-k chunks (overlap ≥ --min-topk-overlap) and a Spearman rank
+correlation above --min-spearman.
+
+Exits with status 1 when a tolerance is violated, so it can gate a
+backend switch in CI.
+
+Usage:
+    python onnx_accuracy.py                       # onnx-int8 vs torch
+    python onnx_accuracy.py --backend onnx
+    python onnx_accuracy.py --persist-dir faiss_store --n-texts 500
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from src.models import EMBEDDING_MODEL_NAME, RERANK_MODEL_NAME, get_embedding_model, get_reranker
+
+
+SAMPLE_QUERIES = [
+    "What is the monthly rent and when is it due?",
+    "Who is responsible for repairs and maintenance?",
+    "What is the security deposit amount?",
+    "Can the tenant sublet the premises?",
+    "What happens if the lease is terminated early?",
+    "What is the parcel number of the property?",
+    "Which party pays property taxes and insurance?",
+    "What are the renewal options in the lease?",
+]
+
+FALLBACK_TEXTS = [
+    "The Tenant shall pay a monthly rent of $2,400 on the first day of each month.",
+    "The Landlord is responsible for structural repairs; the Tenant handles routine maintenance.",
+    "A security deposit equal to two months' rent is payable on signing.",
+    "The Tenant may not sublet the premises without prior written consent of the Landlord.",
+    "Early termination requires ninety days' notice and payment of a termination fee.",
+    "The property is recorded under Assessor's Parcel Number 123-456-789.",
+    "Property taxes are paid by the Landlord; the Tenant maintains contents insurance.",
+    "The Tenant has two options to renew for additional terms of five years each.",
+    "Clause 14.2: Any dispute shall be resolved by arbitration in the county of the premises.",
+    "The premises shall be used solely for residential purposes.",
+]
+
+
+# DATA
+
+def load_texts(persist_dir, n_texts):
+
+    db_path = os.path.join(persist_dir, "chunks.db")
+
+    if os.path.exists(db_path):
+        # Read-only and without ChunkStore, whose constructor migrates the
+        # schema: an accuracy check must not write to the live store
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+            live = "WHERE deleted = 0" if "deleted" in columns else ""
+
+            rows = conn.execute(
+                f"SELECT compressed, text FROM chunks {live} ORDER BY id LIMIT ?",
+                (n_texts,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        texts = [decode_text(compressed, text) for compressed, text in rows]
+
+        if texts:
+            print(f"[INFO] Using {len(texts)} chunks from {db_path}")
+            return texts
+
+    print("[INFO] No chunk store found, using built-in sample texts")
+
+    return FALLBACK_TEXTS
+
+
+def decode_text(compressed: int, data: bytes) -> str:
+    if compressed:
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(data)
+
+    return bytes(data).decode("utf-8")
+
+
+# METRICS
+
+def spearman(a, b):
+
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+
+    if len(a) < 2:
+        return 1.0
+
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def timed(fn, *args, **kwargs):
+
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+
+    return result, (time.perf_counter() - start) * 1000
+
+
+# CHECKS
+
+def check_embeddings(texts, backend):
+
+    encode_kwargs = dict(batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+
+    baseline = get_embedding_model(EMBEDDING_MODEL_NAME, device="cpu", backend="torch")
+    candidate = get_embedding_model(EMBEDDING_MODEL_NAME, device="cpu", backend=backend)
+
+    # Warm-up so the timings exclude lazy initialisation
+    baseline.encode(texts[:2], **encode_kwargs)
+    candidate.encode(texts[:2], **encode_kwargs)
+
+    base_emb, base_ms = timed(baseline.encode, texts, **encode_kwargs)
+    cand_emb, cand_ms = timed(candidate.encode, texts, **encode_kwargs)
+
+    cosines = np.sum(base_emb * cand_emb, axis=1)
+
+    return {
+        "min_cosine": round(float(np.min(cosines)), 5),
+        "mean_cosine": round(float(np.mean(cosines)), 5),
+        "torch_ms": round(base_ms, 2),
+        "backend_ms": round(cand_ms, 2),
+        "speedup": round(base_ms / cand_ms, 2) if cand_ms else None
+    }
+
+
+def check_rerank(texts, backend, top_k):
+
+    baseline = get_reranker(RERANK_MODEL_NAME, device="cpu", backend="torch")
+    candidate = get_reranker(RERANK_MODEL_NAME, device="cpu", backend=backend)
+
+    overlaps = []
+    correlations = []
+    base_total = 0
+    cand_total = 0
+
+    for query in SAMPLE_QUERIES:
+
+        pairs = [[query, text] for text in texts]
+
+        base_scores, base_ms = timed(baseline.predict, pairs, batch_size=32)
+        cand_scores, cand_ms = timed(candidate.predict, pairs, batch_size=32)
+
+        base_total += base_ms
+        cand_total += cand_ms
+
+        k = min(top_k, len(texts))
+        base_top = set(np.argsort(-base_scores)[:k])
+        cand_top = set(np.argsort(-cand_scores)[:k])
+
+        overlaps.append(len(base_top & cand_top) / k)
+        correlations.append(spearman(base_scores, cand_scores))
+
+    return {
+        "min_topk_overlap": round(float(np.min(overlaps)), 4),
+        "mean_topk_overlap": round(float(np.mean(overlaps)), 4),
+        "min_spearman": round(float(np.min(correlations)), 4),
+        "torch_ms": round(base_total, 2),
+        "backend_ms": round(cand_total, 2),
+        "speedup": round(base_total / cand_total, 2) if cand_total else None
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="onnx-int8", choices=["onnx", "onnx-int8"])
+    parser.add_argument("--persist-dir", default="faiss_store")
+    parser.add_argument("--n-texts", type=int, default=200)
+    parser.add_argument("--rerank-candidates", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--min-topk-overlap", type=float, default=0.66)
+    parser.add_argument("--min-spearman", type=float, default=0.95)
+    args = parser.parse_args()
+
+    texts = load_texts(args.persist_dir, args.n_texts)
+
+    embedding_report = check_embeddings(texts, args.backend)
+    rerank_report = check_rerank(texts[:args.rerank_candidates], args.backend, args.top_k)
+
+    failures = []
+
+    if embedding_report["min_cosine"] < args.min_cosine:
+        failures.append(f"embedding min cosine {embedding_report['min_cosine']} < {args.min_cosine}")
+
+    if rerank_report["min_topk_overlap"] < args.min_topk_overlap:
+        failures.append(f"rerank top-{args.top_k} overlap {rerank_report['min_topk_overlap']} < {args.min_topk_overlap}")
+
+    if rerank_report["min_spearman"] < args.min_spearman:
+        failures.append(f"rerank spearman {rerank_report['min_spearman']} < {args.min_spearman}")
+
+    print("\n" + "=" * 60)
+    print(f"BACKEND {args.backend} vs torch")
+    print("=" * 60)
+    print("Embeddings:", embedding_report)
+    print("Rerank:    ", rerank_report)
+    print("=" * 60)
+
+    if failures:
+        for failure in failures:
+            print("[FAIL]", failure)
+        sys.exit(1)
+
+    print("[PASS] Backend within tolerance of the PyTorch baseline")
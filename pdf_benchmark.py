@@ -0,0 +1,130 @@
+"""
+Pages/second of the PDF extraction backends used by DataLoader.
+
+Every (backend, workers) combination loads the same PDFs through
+DataLoader.load_file, so the numbers include the page-range process
+pool. Every combination is checked against the original loader,
+langchain's PyPDFLoader (plus the source_file / file_size_mb that
+DataLoader adds): "Metadata" compares every metadata key our documents
+carry, "Text" the page_content. PyPDFLoader-only keys (producer,
+total_pages, ...) are not compared. The pypdf backend should match on
+both; pymupdf extracts text differently and is expected to differ on
+text only.
+
+Usage:
+    python pdf_benchmark.py data/*.pdf
+    python pdf_benchmark.py data/lease.pdf --workers 1 2 4 8 --json pdf_report.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from src.data_loaders import PDF_BACKENDS, DataLoader
+
+
+def baseline_documents(paths):
+    """
+    What DataLoader.load_file returned before the PDF backends: PyPDFLoader
+    pages with source_file / file_size_mb added.
+    """
+    documents = []
+
+    for path in paths:
+        file_size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        for doc in PyPDFLoader(path).load():
+            doc.metadata["source_file"] = os.path.basename(path)
+            doc.metadata["file_size_mb"] = round(file_size_mb, 2)
+            documents.append(doc)
+
+    return documents
+
+
+def metadata_matches(documents, baseline) -> bool:
+    return len(documents) == len(baseline) and all(
+        all(key in base.metadata and base.metadata[key] == value for key, value in doc.metadata.items())
+        for doc, base in zip(documents, baseline)
+    )
+
+
+def text_matches(documents, baseline) -> bool:
+    return len(documents) == len(baseline) and all(
+        doc.page_content == base.page_content for doc, base in zip(documents, baseline)
+    )
+
+
+def run(paths, backend, workers, repeats):
+
+    loader = DataLoader(pdf_backend=backend, pdf_workers=workers)
+
+    timings = []
+    documents = []
+
+    for _ in range(repeats):
+        documents = []
+
+        start = time.perf_counter()
+
+        for path in paths:
+            documents.extend(loader.load_file(path))
+
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+
+    return documents, {
+        "backend": backend,
+        "workers": workers,
+        "pages": len(documents),
+        "seconds": round(best, 3),
+        "pages_per_sec": round(len(documents) / best, 1) if best else None,
+        "chars": sum(len(doc.page_content) for doc in documents)
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--backends", nargs="+", default=list(PDF_BACKENDS), choices=PDF_BACKENDS)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="also write the report rows to this file")
+    args = parser.parse_args()
+
+    baseline_docs = baseline_documents(args.pdfs)
+
+    rows = []
+
+    for backend in args.backends:
+        for workers in sorted(set(args.workers)):
+
+            documents, row = run(args.pdfs, backend, workers, args.repeats)
+            row["metadata_matches"] = metadata_matches(documents, baseline_docs)
+            row["text_matches"] = text_matches(documents, baseline_docs)
+
+            rows.append(row)
+
+    print("\n" + "=" * 80)
+    print(f"PDF EXTRACTION ({len(args.pdfs)} files, {len(baseline_docs)} pages, best of {args.repeats})")
+    print("=" * 80)
+    print(f"{'Backend':<10}{'Workers':>8}{'Seconds':>10}{'Pages/s':>10}{'Chars':>12}{'Metadata':>10}{'Text':>10}")
+    print("-" * 80)
+
+    for row in rows:
+        print(
+            f"{row['backend']:<10}{row['workers']:>8}{row['seconds']:>10.3f}"
+            f"{row['pages_per_sec']:>10.1f}{row['chars']:>12}"
+            f"{'same' if row['metadata_matches'] else 'DIFFERS':>10}{'same' if row['text_matches'] else 'differs':>10}"
+        )
+
+    print("=" * 80)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
@@ -0,0 +1,128 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching for model inference.
+
+    Concurrent callers submit single items; the batcher waits up to
+    `max_wait_ms` after the first item (or until `max_batch_size` items
+    are queued) and runs them through `batch_fn` in one forward pass.
+
+    batch_fn(items) → list of results, one per item, in order.
+    run_batch(fn, items) → awaitable that executes fn(items); use it to
+    push the blocking call onto a thread pool (StagePool.run).
+
+    The queue and collector task belong to the event loop that created
+    them; a submit() from another loop (a restarted app, a second test
+    client) starts a fresh pair on that loop.
+    """
+
+    def __init__(self, batch_fn, run_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self.batches = 0
+        self.items = 0
+
+        self._loop = None
+        self._queue = None
+        self._collector = None
+
+        # Strong references: the loop only keeps weak ones to tasks, so
+        # an unreferenced batch task can be garbage-collected mid-flight
+        self._tasks = set()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def submit(self, item):
+
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop or self._collector is None or self._collector.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._collector = self._spawn(self._collect())
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+
+        return await future
+
+    async def _collect(self):
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Run the batch in its own task so the next one can be
+            # collected while this one is on the pool
+            self._spawn(self._run(batch))
+
+    async def _run(self, batch):
+
+        items = [item for item, _ in batch]
+
+        self.batches += 1
+        self.items += len(items)
+
+        try:
+            results = await self.run_batch(self.batch_fn, items)
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+def flatten_batches(batch_fn):
+    """
+    Adapt a function over a flat list (e.g. CrossEncoder.predict over
+    pairs) so each item can itself be a list: the lists are concatenated,
+    scored in one call and split back per item.
+    """
+
+    def run(items):
+        flat = [x for item in items for x in item]
+        scores = list(batch_fn(flat)) if flat else []
+
+        results = []
+        offset = 0
+
+        for item in items:
+            results.append(scores[offset:offset + len(item)])
+            offset += len(item)
+
+        return results
+
+    return run
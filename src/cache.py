@@ -0,0 +1,273 @@
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class LRUCache:
+    """
+    Bounded key → value cache with LRU eviction, an optional TTL and
+    hit / miss counters. Safe to share between threads.
+
+    Entries can carry `tags` describing what they depend on, so
+    invalidate() can drop only the entries a change affects.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl_seconds: float = None):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+        self._entries = OrderedDict()  # key → (expires_at, value, tags)
+        self._lock = threading.Lock()
+
+    def _expiry(self) -> float:
+        if self.ttl_seconds is None:
+            return float("inf")
+        return time.monotonic() + self.ttl_seconds
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def tags(self, key):
+        """
+        Tags of a cached entry (None if absent or untagged). Does not
+        count as a hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+
+    def put(self, key, value, tags=None):
+        with self._lock:
+            self._entries[key] = (self._expiry(), value, tags)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate) -> int:
+        """
+        Drop every tagged entry for which predicate(tags) is true.
+        Untagged entries are kept. Returns the number dropped.
+        """
+        with self._lock:
+            stale = [
+                key for key, (_, _, tags) in self._entries.items()
+                if tags is not None and predicate(tags)
+            ]
+
+            for key in stale:
+                del self._entries[key]
+
+            self.invalidated += len(stale)
+
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class SemanticCache:
+    """
+    Response cache that can also be looked up by query embedding.
+
+    Embeddings live in one contiguous, preallocated (capacity × dim)
+    matrix of normalised vectors, so a semantic lookup is a single
+    matrix-vector product + argmax instead of a Python loop over every
+    cached query. Entries are evicted LRU once the cache is full and
+    expire after `ttl_seconds`; tagged entries can be dropped
+    selectively with invalidate(), as in LRUCache.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl_seconds: float = None, threshold: float = 0.90):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+        self._matrix = None                           # allocated on first put
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._expires = np.full(capacity, np.inf)
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._tags = [None] * capacity
+
+        self._slots = OrderedDict()                   # key → slot, in LRU order
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self._lock = threading.Lock()
+
+    # INTERNALS
+
+    def _release(self, slot: int):
+        key = self._keys[slot]
+
+        self._slots.pop(key, None)
+        self._valid[slot] = False
+        self._keys[slot] = None
+        self._values[slot] = None
+        self._tags[slot] = None
+        self._free.append(slot)
+
+    def _expire(self):
+        expired = np.flatnonzero(self._valid & (self._expires < time.monotonic()))
+
+        for slot in expired:
+            self._release(int(slot))
+
+    def _touch(self, key):
+        self._slots.move_to_end(key)
+
+    # LOOKUP
+
+    def get(self, key):
+        """
+        Exact lookup by query text. A miss here is not counted; callers
+        fall through to lookup(), which records the miss.
+        """
+        with self._lock:
+            slot = self._slots.get(key)
+
+            if slot is None or self._expires[slot] < time.monotonic():
+                if slot is not None:
+                    self._release(slot)
+                return None
+
+            self._touch(key)
+            self.exact_hits += 1
+            return self._values[slot]
+
+    def lookup(self, embedding: np.ndarray):
+        """
+        Top-1 semantic lookup. Returns (cached_key, value, similarity)
+        when the best match reaches `threshold`, else None.
+        """
+        with self._lock:
+            if self._matrix is None or not self._valid.any():
+                self.misses += 1
+                return None
+
+            self._expire()
+
+            query = np.asarray(embedding, dtype="float32").reshape(-1)
+            query = query / (np.linalg.norm(query) or 1.0)
+
+            sims = self._matrix @ query
+            sims[~self._valid] = -np.inf
+
+            best = int(np.argmax(sims))
+
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            self._touch(key)
+            self.semantic_hits += 1
+
+            return key, self._values[best], float(sims[best])
+
+    # WRITE
+
+    def put(self, key, embedding: np.ndarray, value, tags=None):
+        embedding = np.asarray(embedding, dtype="float32").reshape(-1)
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.capacity, embedding.shape[0]), dtype="float32")
+
+            slot = self._slots.get(key)
+
+            if slot is None:
+                if not self._free:
+                    # Evict least recently used
+                    lru_key = next(iter(self._slots))
+                    self._release(self._slots[lru_key])
+
+                slot = self._free.pop()
+
+            self._matrix[slot] = embedding / (np.linalg.norm(embedding) or 1.0)
+            self._valid[slot] = True
+            self._expires[slot] = (
+                time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else np.inf
+            )
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._tags[slot] = tags
+
+            self._slots[key] = slot
+            self._touch(key)
+
+    def invalidate(self, predicate) -> int:
+        """
+        Drop every tagged entry for which predicate(tags) is true.
+        """
+        with self._lock:
+            stale = [
+                slot for slot in self._slots.values()
+                if self._tags[slot] is not None and predicate(self._tags[slot])
+            ]
+
+            for slot in stale:
+                self._release(slot)
+
+            self.invalidated += len(stale)
+
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._slots.values()):
+                self._release(slot)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
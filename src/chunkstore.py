@@ -0,0 +1,386 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from src.retrieval import fts_query
+from src.tracing import tracer
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+class ChunkStore:
+    """
+    SQLite-backed chunk metadata keyed by FAISS vector id.
+
+    Only `source` and `page` are small enough to matter for filtering;
+    the chunk text lives in its own column and is fetched lazily for the
+    handful of ids a search returns, so opening the store costs the same
+    no matter how large the corpus is. The text column can optionally be
+    zstd compressed.
+
+    Chunk text is also indexed in a contentless FTS5 table (rowid =
+    vector id) for BM25 keyword search next to the FAISS index.
+    """
+
+    def __init__(self, db_path: str, compress: bool = False, compression_level: int = 3):
+
+        if compress and zstandard is None:
+            raise ImportError(
+                "Chunk text compression requires the 'zstandard' package."
+            )
+
+        self.db_path = db_path
+        self.compress = compress
+
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if compress else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA mmap_size=268435456")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    compressed INTEGER NOT NULL,
+                    text BLOB NOT NULL
+                )
+                """
+            )
+
+            # Stores created before chunk hashes / deletes existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+            if "chunk_hash" not in columns:
+                self._conn.execute("ALTER TABLE chunks ADD COLUMN chunk_hash TEXT")
+            if "deleted" not in columns:
+                self._conn.execute("ALTER TABLE chunks ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunks_source_hash ON chunks (source, chunk_hash)"
+            )
+
+            # Content hashes of ingested files, for duplicate-upload detection
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    file_hash TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    ingested_at REAL NOT NULL
+                )
+                """
+            )
+
+            has_fts = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+            ).fetchone()
+
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='')"
+            )
+
+        # Stores created before keyword search existed
+        if not has_fts:
+            self._backfill_fts()
+
+    # ENCODING
+
+    def _encode_text(self, text: str):
+        data = (text or "").encode("utf-8")
+
+        if self._compressor is not None:
+            return 1, self._compressor.compress(data)
+
+        return 0, data
+
+    def _decode_text(self, compressed: int, data: bytes) -> str:
+        if compressed:
+            if self._decompressor is None:
+                raise ImportError(
+                    "Chunk store contains zstd-compressed text; install 'zstandard'."
+                )
+            data = self._decompressor.decompress(data)
+
+        return bytes(data).decode("utf-8")
+
+    # WRITE
+
+    def add(self, start_id: int, metadata: list):
+        """
+        Insert rows for vector ids start_id, start_id + 1, ...
+        """
+        rows = []
+
+        for offset, meta in enumerate(metadata):
+            compressed, text = self._encode_text(meta.get("text"))
+            page = meta.get("page", 0)
+
+            rows.append((
+                start_id + offset,
+                meta.get("source", "Unknown"),
+                int(page) if str(page).isdigit() else 0,
+                compressed,
+                text,
+                meta.get("chunk_hash")
+            ))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, source, page, compressed, text, chunk_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.executemany(
+                "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)",
+                [(start_id + offset, meta.get("text") or "") for offset, meta in enumerate(metadata)]
+            )
+
+    def _backfill_fts(self, batch_size: int = 1000):
+        last_id = -1
+
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, compressed, text FROM chunks WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)",
+                    [(row_id, self._decode_text(compressed, text)) for row_id, compressed, text in rows]
+                )
+
+            last_id = rows[-1][0]
+
+    def delete(self, source: str, chunk_hashes=None) -> list:
+        """
+        Tombstone the live chunks of `source` (only those whose hash is in
+        `chunk_hashes`, when given) and return their vector ids. The rows
+        stay until compaction has dropped the vectors and calls purge().
+        """
+        query = "SELECT id FROM chunks WHERE source = ? AND deleted = 0"
+        params = [source]
+
+        if chunk_hashes is not None:
+            chunk_hashes = list(chunk_hashes)
+            if not chunk_hashes:
+                return []
+
+            query += f" AND chunk_hash IN ({','.join('?' * len(chunk_hashes))})"
+            params.extend(chunk_hashes)
+
+        with self._lock, self._conn:
+            ids = [row[0] for row in self._conn.execute(query, params)]
+
+            self._conn.executemany(
+                "UPDATE chunks SET deleted = 1 WHERE id = ?",
+                [(i,) for i in ids]
+            )
+
+            # A deleted document can be uploaded again later
+            if chunk_hashes is None:
+                self._conn.execute("DELETE FROM files WHERE source = ?", (source,))
+
+        return ids
+
+    def purge(self, ids):
+        """
+        Drop tombstoned rows whose vectors compaction has removed.
+        """
+        ids = [int(i) for i in ids]
+
+        with self._lock, self._conn:
+            rows = []
+
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows.extend(self._conn.execute(
+                    f"SELECT id, compressed, text FROM chunks WHERE deleted = 1 AND id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+
+            # A contentless FTS row is removed by replaying its text
+            self._conn.executemany(
+                "INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', ?, ?)",
+                [(row_id, self._decode_text(compressed, text)) for row_id, compressed, text in rows]
+            )
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE id = ?",
+                [(row[0],) for row in rows]
+            )
+
+    # READ
+
+    def id_ranges(self) -> list:
+        """
+        Live chunks as (source, page, start_id, end_id) runs of
+        consecutive ids with the same source and page; end is exclusive.
+        """
+        runs = []
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, source, page FROM chunks WHERE deleted = 0 ORDER BY id"
+            )
+
+            for row_id, source, page in rows:
+                if runs and runs[-1][0] == source and runs[-1][1] == page and runs[-1][3] == row_id:
+                    runs[-1][3] = row_id + 1
+                else:
+                    runs.append([source, page, row_id, row_id + 1])
+
+        return [tuple(run) for run in runs]
+
+    def deleted_ids(self) -> list:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM chunks WHERE deleted = 1")]
+
+    def get(self, ids) -> dict:
+        """
+        Fetch {id: {"text", "page", "source"}} for the given live vector ids.
+        """
+        ids = [int(i) for i in ids]
+
+        if not ids:
+            return {}
+
+        placeholders = ",".join("?" * len(ids))
+
+        with tracer.span("chunkstore.get", ids=len(ids)), self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, source, page, compressed, text FROM chunks WHERE id IN ({placeholders}) AND deleted = 0",
+                ids
+            ).fetchall()
+
+        return {
+            row_id: {
+                "text": self._decode_text(compressed, text),
+                "page": page,
+                "source": source
+            }
+            for row_id, source, page, compressed, text in rows
+        }
+
+    def keyword_search(
+        self,
+        query: str,
+        top_k: int = 20,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ) -> list:
+        """
+        BM25 keyword search over live chunks, optionally restricted to
+        `sources` and a page range. Returns [(id, score)] best first;
+        higher score is better.
+        """
+        match = fts_query(query)
+
+        if not match:
+            return []
+
+        conditions = ""
+        params = [match]
+
+        if sources is not None:
+            conditions += f" AND chunks.source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+        if page_min is not None:
+            conditions += " AND chunks.page >= ?"
+            params.append(page_min)
+        if page_max is not None:
+            conditions += " AND chunks.page <= ?"
+            params.append(page_max)
+
+        params.append(top_k)
+
+        with tracer.span("fts.search", top_k=top_k, filtered=len(params) > 2) as span, self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT chunks_fts.rowid, bm25(chunks_fts)
+                FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid
+                WHERE chunks_fts MATCH ? AND chunks.deleted = 0{conditions}
+                ORDER BY bm25(chunks_fts)
+                LIMIT ?
+                """,
+                params
+            ).fetchall()
+
+            span.set(results=len(rows))
+
+        # bm25() is lower-is-better
+        return [(row_id, -score) for row_id, score in rows]
+
+    def chunk_hashes(self, source: str) -> set:
+        """
+        Hashes of the chunks already stored for `source`.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_hash FROM chunks WHERE source = ? AND chunk_hash IS NOT NULL AND deleted = 0",
+                (source,)
+            ).fetchall()
+
+        return {row[0] for row in rows}
+
+    # FILES
+
+    def find_file(self, file_hash: str):
+        """
+        Source name under which identical file content was ingested, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source FROM files WHERE file_hash = ?",
+                (file_hash,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def add_file(self, file_hash: str, source: str, chunks: int):
+        """
+        Record the current revision of `source`, replacing older ones.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE source = ?", (source,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (file_hash, source, chunks, ingested_at) VALUES (?, ?, ?, ?)",
+                (file_hash, source, chunks, time.time())
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks WHERE deleted = 0").fetchone()[0]
+
+    # MIGRATION
+
+    def import_pickle(self, meta_path: str):
+        """
+        One-off migration from the old metadata.pkl list, where the list
+        position is the vector id. The pickle is renamed afterwards so it
+        is never read again.
+        """
+        with open(meta_path, "rb") as f:
+            metadata = pickle.load(f)
+
+        self.add(0, metadata)
+        os.replace(meta_path, meta_path + ".migrated")
+
+        print(f"[INFO] Migrated {len(metadata)} chunks from {meta_path} to {self.db_path}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
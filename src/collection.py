@@ -0,0 +1,372 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.models import encode_queries
+from src.retrieval import reciprocal_rank_fusion
+from src.tracing import tracer
+from src.vectorstore import FaissVectorStore
+
+
+COLLECTION_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Collection:
+    """
+    A named document set with its own index and chunk store, split into
+    one or more FaissVectorStore shards.
+
+    Documents are routed to a shard by a hash of their source name, so
+    every chunk of a document (and its delete / upsert bookkeeping)
+    lives in one shard. Searches fan out to all shards in parallel and
+    are merged by score. A single-shard collection is a plain store
+    directory, which is how the original faiss_store/ is served.
+
+    Exposes the FaissVectorStore methods used by IngestionPipeline and
+    the query path, so either can be passed where a store is expected.
+    """
+
+    def __init__(self, name: str, persist_dir: str, n_shards: int = None, **store_kwargs):
+        self.name = name
+        self.persist_dir = persist_dir
+        os.makedirs(persist_dir, exist_ok=True)
+
+        # The shard count is fixed when the collection is created
+        config_path = os.path.join(persist_dir, "collection.json")
+
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                n_shards = json.load(f)["shards"]
+        else:
+            n_shards = n_shards or 1
+            if n_shards > 1:
+                with open(config_path, "w") as f:
+                    json.dump({"shards": n_shards}, f)
+
+        if n_shards == 1:
+            self.shards = [FaissVectorStore(persist_dir, **store_kwargs)]
+        else:
+            self.shards = [
+                FaissVectorStore(os.path.join(persist_dir, f"shard_{i:03d}"), **store_kwargs)
+                for i in range(n_shards)
+            ]
+
+        self._pool = ThreadPoolExecutor(max_workers=n_shards, thread_name_prefix=f"shard-{name}") if n_shards > 1 else None
+
+        self.generation = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        for shard in self.shards:
+            shard.add_listener(self._forward_change)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(shard.ntotal for shard in self.shards)
+
+    def stats(self) -> dict:
+        return {
+            "vectors": self.ntotal,
+            "deleted": sum(len(shard.tombstones) for shard in self.shards),
+            "segments": sum(len(shard.segments) for shard in self.shards),
+            "generation": self.generation
+        }
+
+    def shard_for(self, source: str) -> FaissVectorStore:
+        return self.shards[zlib.crc32(source.encode("utf-8")) % len(self.shards)]
+
+    def _map(self, fn, *args, **kwargs) -> list:
+        """
+        fn(shard, *args, **kwargs) for every shard, in parallel.
+        """
+        if self._pool is None:
+            return [fn(self.shards[0], *args, **kwargs)]
+
+        def on_shard(i, shard):
+            with tracer.span("shard", collection=self.name, shard=i):
+                return fn(shard, *args, **kwargs)
+
+        # One context copy per thread: a context can only be entered once at a time
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, on_shard, i, shard)
+            for i, shard in enumerate(self.shards)
+        ]
+        return [future.result() for future in futures]
+
+    # CHANGE NOTIFICATION
+
+    def add_listener(self, fn):
+        """
+        As FaissVectorStore.add_listener; change["generation"] is the
+        collection's generation and change["collection"] its name.
+        """
+        self._listeners.append(fn)
+
+    def _forward_change(self, change: dict):
+        with self._lock:
+            self.generation += 1
+            change = {**change, "generation": self.generation, "collection": self.name}
+
+        for fn in self._listeners:
+            fn(change)
+
+    # WRITE
+
+    def store(self, embeddings: np.ndarray, metadata: list):
+
+        by_shard = {}
+
+        for row, meta in enumerate(metadata):
+            shard = self.shard_for(meta.get("source", "Unknown"))
+            by_shard.setdefault(id(shard), (shard, []))[1].append(row)
+
+        for shard, rows in by_shard.values():
+            shard.store(embeddings[rows], [metadata[row] for row in rows])
+
+    def delete_source(self, source: str, chunk_hashes=None) -> int:
+        return self.shard_for(source).delete_source(source, chunk_hashes)
+
+    # FILES
+
+    def find_file(self, content_hash: str):
+        for shard in self.shards:
+            source = shard.find_file(content_hash)
+            if source is not None:
+                return source
+        return None
+
+    def chunk_hashes(self, source: str) -> set:
+        return self.shard_for(source).chunk_hashes(source)
+
+    def add_file(self, content_hash: str, source: str, chunks: int):
+        self.shard_for(source).add_file(content_hash, source, chunks)
+
+    # SEARCH
+
+    def search(self, query_text: str = None, top_k: int = 5, query_embedding: np.ndarray = None, **kwargs):
+        """
+        FaissVectorStore.search on every shard, merged by score. Results
+        also carry the "shard" they came from.
+        """
+        return self.search_batch([query_text], top_k=top_k, query_embeddings=query_embedding, **kwargs)[0]
+
+    def search_batch(self, query_texts: list = None, top_k: int = 5, query_embeddings: np.ndarray = None, **kwargs) -> list:
+        """
+        As FaissVectorStore.search_batch: every shard runs the whole batch
+        as one matrix search, then each query's results are merged.
+        """
+        if len(self.shards) == 1:
+            return self.shards[0].search_batch(query_texts, top_k=top_k, query_embeddings=query_embeddings, **kwargs)
+
+        # Encode once, not once per shard
+        if query_embeddings is None:
+            query_embeddings = encode_queries(query_texts, self.shards[0].embedding_model_name)
+
+        per_shard = self._map(
+            lambda shard: shard.search_batch(query_texts, top_k=top_k, query_embeddings=query_embeddings, **kwargs)
+        )
+
+        batch = []
+
+        for per_query in zip(*per_shard):
+            results = [
+                {**doc, "shard": i}
+                for i, docs in enumerate(per_query)
+                for doc in docs
+            ]
+            batch.append(sorted(results, key=lambda doc: doc["score"], reverse=True)[:top_k])
+
+        return batch
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        query_embedding: np.ndarray = None,
+        **kwargs
+    ):
+        """
+        As FaissVectorStore.hybrid_search. The dense and keyword lists of
+        every shard are merged by score first, then fused once, so a
+        sharded collection ranks like a single store would (BM25 idf is
+        per shard).
+        """
+        return self.hybrid_search_batch(
+            [query_text], top_k=top_k, candidates=candidates, rrf_k=rrf_k,
+            query_embeddings=query_embedding, **kwargs
+        )[0]
+
+    def hybrid_search_batch(
+        self,
+        query_texts: list,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        query_embeddings: np.ndarray = None,
+        **kwargs
+    ) -> list:
+        """
+        hybrid_search() for many queries; each shard produces the
+        candidate lists of the whole batch in one call.
+        """
+        if len(self.shards) == 1:
+            return self.shards[0].hybrid_search_batch(
+                query_texts, top_k=top_k, candidates=candidates, rrf_k=rrf_k,
+                query_embeddings=query_embeddings, **kwargs
+            )
+
+        if query_embeddings is None:
+            query_embeddings = encode_queries(query_texts, self.shards[0].embedding_model_name)
+
+        per_shard = self._map(
+            lambda shard: shard.hybrid_candidates_batch(query_texts, query_embeddings, candidates, **kwargs)
+        )
+
+        ranked = []
+
+        for per_query in zip(*per_shard):
+            dense = sorted(
+                ((score, (i, idx)) for i, (shard_dense, _) in enumerate(per_query) for idx, score in shard_dense),
+                reverse=True
+            )[:candidates]
+            keyword = sorted(
+                ((score, (i, idx)) for i, (_, shard_keyword) in enumerate(per_query) for idx, score in shard_keyword),
+                reverse=True
+            )[:candidates]
+
+            fused = reciprocal_rank_fusion(
+                [[key for _, key in dense], [key for _, key in keyword]],
+                k=rrf_k,
+                top_n=top_k
+            )
+
+            ranked.append((dense, keyword, fused))
+
+        ids_by_shard = {}
+        for _, _, fused in ranked:
+            for (i, idx), _ in fused:
+                ids_by_shard.setdefault(i, set()).add(idx)
+
+        chunks = {
+            (i, idx): chunk
+            for i, ids in ids_by_shard.items()
+            for idx, chunk in self.shards[i].chunk_store.get(ids).items()
+        }
+
+        batch = []
+
+        for dense, keyword, fused in ranked:
+            dense_scores = {key: score for score, key in dense}
+            keyword_scores = {key: score for score, key in keyword}
+
+            results = [
+                {
+                    "id": key[1],
+                    "shard": key[0],
+                    **chunks[key],
+                    "score": score,
+                    "dense_score": dense_scores.get(key),
+                    "keyword_score": keyword_scores.get(key)
+                }
+                for key, score in fused
+                if key in chunks
+            ]
+
+            dense_floor = dense[-1][0] if len(dense) >= candidates else -np.inf
+
+            batch.append((results, dense_floor))
+
+        return batch
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+class CollectionRegistry:
+    """
+    Named collections under `root_dir/<name>/`, opened lazily and kept
+    for the life of the process. The default collection can be pointed
+    at an existing store directory (e.g. faiss_store/).
+    """
+
+    def __init__(
+        self,
+        root_dir: str = "collections",
+        default_name: str = "default",
+        default_dir: str = None,
+        listeners: list = (),
+        **store_kwargs
+    ):
+        self.root_dir = root_dir
+        self.default_name = default_name
+        self.default_dir = default_dir
+        self.listeners = list(listeners)
+        self.store_kwargs = store_kwargs
+
+        self._collections = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        if name == self.default_name and self.default_dir:
+            return self.default_dir
+        return os.path.join(self.root_dir, name)
+
+    def names(self) -> list:
+        names = {self.default_name} | set(self._collections)
+        names.update(
+            entry for entry in os.listdir(self.root_dir)
+            if COLLECTION_NAME.match(entry) and os.path.isdir(os.path.join(self.root_dir, entry))
+        )
+        return sorted(names)
+
+    def exists(self, name: str) -> bool:
+        return name in self._collections or name == self.default_name or os.path.isdir(self._path(name))
+
+    def get(self, name: str = None, create: bool = True, shards: int = None) -> Collection:
+        """
+        Open (or, with create=True, create) a collection. `shards` only
+        applies when the collection is created. Raises ValueError for
+        an invalid name and KeyError for a missing one with create=False.
+        """
+        name = name or self.default_name
+
+        collection = self._collections.get(name)
+        if collection is not None:
+            return collection
+
+        if not COLLECTION_NAME.match(name):
+            raise ValueError(f"Invalid collection name: {name!r}")
+
+        with self._lock:
+            if name not in self._collections:
+
+                if not create and not self.exists(name):
+                    raise KeyError(name)
+
+                collection = Collection(name, self._path(name), n_shards=shards, **self.store_kwargs)
+
+                for fn in self.listeners:
+                    collection.add_listener(fn)
+
+                self._collections[name] = collection
+                print(f"[INFO] Opened collection {name} ({len(collection.shards)} shards)")
+
+            return self._collections[name]
+
+    def opened(self) -> list:
+        return list(self._collections.values())
+
+    def close(self):
+        for collection in self._collections.values():
+            collection.close()
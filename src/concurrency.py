@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+
+class StagePool:
+    """
+    Runs blocking pipeline stages (encode, FAISS search, rerank, ...)
+    off the event loop on a bounded thread pool, with a separate
+    concurrency limit per stage.
+
+    Threads rather than processes: torch and faiss release the GIL
+    inside their kernels, and the models stay shared in one process.
+
+    The semaphores belong to an event loop and are created on first
+    use; a different running loop (a restarted app, a second
+    asyncio.run, tests) gets a fresh set, like MicroBatcher's queue.
+    """
+
+    def __init__(self, max_workers: int = 4, stage_limits: dict = None):
+        self.max_workers = max_workers
+        self.stage_limits = dict(stage_limits or {})
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="rag-stage"
+        )
+        self._loop = None
+        self._semaphores = {}
+
+        # Requests waiting for / holding each stage's limit (event loop only)
+        self.waiting = Counter()
+        self.running = Counter()
+
+    @asynccontextmanager
+    async def limit(self, stage: str):
+        """
+        Concurrency limit only, for stages that are already async
+        (e.g. the LLM call).
+        """
+        semaphore = self._semaphore(stage)
+
+        if semaphore is None:
+            self.running[stage] += 1
+            try:
+                yield
+            finally:
+                self.running[stage] -= 1
+            return
+
+        self.waiting[stage] += 1
+
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[stage] -= 1
+
+        self.running[stage] += 1
+
+        try:
+            yield
+        finally:
+            self.running[stage] -= 1
+            semaphore.release()
+
+    def _semaphore(self, stage: str):
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores = {
+                name: asyncio.Semaphore(limit)
+                for name, limit in self.stage_limits.items()
+            }
+
+        return self._semaphores.get(stage)
+
+    async def run(self, stage: str, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool under `stage`'s limit, in a
+        copy of the caller's context (so trace spans nest correctly).
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        async with self.limit(stage):
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(context.run, fn, *args, **kwargs)
+            )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
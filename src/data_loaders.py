@@ -1,17 +1,137 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    JSONLoader,
-    Docx2txtLoader,
-)
-from langchain_community.document_loaders.excel import UnstructuredExcelLoader
+
+# PDF EXTRACTION
+#
+# pymupdf → MuPDF (C), much faster on large PDFs
+# pypdf   → pure Python, what PyPDFLoader uses
+
+PDF_BACKENDS = ("pymupdf", "pypdf")
+
+# Below this many pages per worker, spawning the process pool costs more
+# than it saves (see pdf_benchmark.py)
+MIN_PAGES_PER_WORKER = 64
+
+
+def _pdf_page_count(file_path: str, backend: str) -> int:
+
+    if backend == "pymupdf":
+        import pymupdf
+
+        with pymupdf.open(file_path) as pdf:
+            return pdf.page_count
+
+    from pypdf import PdfReader
+
+    return len(PdfReader(file_path).pages)
+
+
+def _iter_pdf_pages(file_path: str, start: int, end: int, backend: str) -> Iterator[Tuple[int, str]]:
+    """
+    (page number, text) for pages [start, end), one page at a time.
+    """
+
+    if backend == "pymupdf":
+        import pymupdf
+
+        with pymupdf.open(file_path) as pdf:
+            for i in range(start, end):
+                yield i, pdf[i].get_text()
+        return
+
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+
+    for i in range(start, end):
+        yield i, reader.pages[i].extract_text()
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int, backend: str) -> List[Tuple[int, str]]:
+    """
+    Module level so it can run in a worker process.
+    """
+    return list(_iter_pdf_pages(file_path, start, end, backend))
+
+
+class PDFPageLoader:
+    """
+    One Document per PDF page, with the same `source` / `page` metadata
+    as PyPDFLoader (0-based page numbers). Page ranges are extracted in
+    parallel worker processes when `workers` > 1.
+    """
+
+    def __init__(self, file_path: str, backend: str = "pymupdf", workers: int = 1):
+
+        if backend not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {backend}. Choose from {PDF_BACKENDS}")
+
+        self.file_path = file_path
+        self.backend = backend
+        self.workers = workers
+
+    def _page_ranges(self, n_pages: int, n_ranges: int) -> List[Tuple[int, int]]:
+        step = -(-n_pages // n_ranges)  # ceil
+        return [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+
+    def _document(self, page: int, text: str) -> Document:
+        return Document(
+            page_content=text,
+            metadata={"source": self.file_path, "page": page}
+        )
+
+    def lazy_load(self) -> Iterator[Document]:
+
+        n_pages = _pdf_page_count(self.file_path, self.backend)
+        workers = min(self.workers, n_pages // MIN_PAGES_PER_WORKER)
+
+        if workers <= 1:
+            # Page by page, so streaming callers hold one page at a time
+            for i, text in _iter_pdf_pages(self.file_path, 0, n_pages, self.backend):
+                yield self._document(i, text)
+            return
+
+        # 4 ranges per worker keeps the pool busy while the caller
+        # consumes pages in order; at most 2 * workers ranges in flight
+        ranges = self._page_ranges(n_pages, workers * 4)
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = []
+            ranges = iter(ranges)
+
+            for start, end in ranges:
+                pending.append(pool.submit(_extract_pdf_pages, self.file_path, start, end, self.backend))
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                pages = pending.pop(0).result()
+
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append(pool.submit(_extract_pdf_pages, self.file_path, *next_range, self.backend))
+
+                for i, text in pages:
+                    yield self._document(i, text)
+
+    def load(self) -> List[Document]:
+        return list(self.lazy_load())
+
+
+def _load_file_worker(file_path: str, chunk_size: int, chunk_overlap: int, pdf_backend: str) -> List[Document]:
+    """
+    Process-pool entry point (must be importable at module level).
+    Already one file per process, so no nested per-page pool.
+    """
+    return DataLoader(chunk_size, chunk_overlap, pdf_backend=pdf_backend, pdf_workers=1).load_file(file_path)
 
 
 class DataLoader:
@@ -20,17 +140,33 @@ class DataLoader:
     """
 
     MAX_FILE_SIZE_MB = 50  # 50MB limit
+    MAX_STREAM_FILE_SIZE_MB = 500  # iter_file keeps only a page at a time in memory
+
+    def __init__(
+        self,
+        chunk_size: int = 800,
+        chunk_overlap: int = 200,
+        pdf_backend: str = "pymupdf",
+        pdf_workers: int = 1
+    ):
+        """
+        pdf_backend → "pymupdf" or "pypdf"
+        pdf_workers → processes used to extract page ranges of one PDF
+        """
+        if pdf_backend not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {pdf_backend}. Choose from {PDF_BACKENDS}")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.pdf_backend = pdf_backend
+        self.pdf_workers = pdf_workers
 
-    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 200):
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
         )
 
-    def load_file(self, file_path: str) -> List[Document]:
-        """
-        Detect file type, validate size, and load document.
-        """
+    def _check_file(self, file_path: str, max_size_mb: float) -> Tuple[Path, float]:
 
         path = Path(file_path)
 
@@ -40,30 +176,40 @@ class DataLoader:
 
         #  Check file size
         file_size_mb = path.stat().st_size / (1024 * 1024)
-        if file_size_mb > self.MAX_FILE_SIZE_MB:
+        if file_size_mb > max_size_mb:
             raise ValueError(
-                f"File size {file_size_mb:.2f}MB exceeds 50MB limit."
+                f"File size {file_size_mb:.2f}MB exceeds {max_size_mb}MB limit."
             )
 
+        return path, file_size_mb
+
+    def _get_loader(self, path: Path):
+
         suffix = path.suffix.lower()
 
-        # Choose correct loader
+        # Choose correct loader (langchain_community is slow to import,
+        # and PDFs, the common case, do not need it)
         if suffix == ".pdf":
-            loader = PyPDFLoader(str(path))
+            loader = PDFPageLoader(str(path), self.pdf_backend, self.pdf_workers)
 
         elif suffix == ".txt":
+            from langchain_community.document_loaders import TextLoader
             loader = TextLoader(str(path))
 
         elif suffix == ".csv":
+            from langchain_community.document_loaders import CSVLoader
             loader = CSVLoader(str(path))
 
         elif suffix == ".xlsx":
+            from langchain_community.document_loaders.excel import UnstructuredExcelLoader
             loader = UnstructuredExcelLoader(str(path))
 
         elif suffix == ".docx":
+            from langchain_community.document_loaders import Docx2txtLoader
             loader = Docx2txtLoader(str(path))
 
         elif suffix == ".json":
+            from langchain_community.document_loaders import JSONLoader
             loader = JSONLoader(
                 file_path=str(path),
                 jq_schema=".",
@@ -73,6 +219,17 @@ class DataLoader:
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
+        return loader
+
+    def load_file(self, file_path: str) -> List[Document]:
+        """
+        Detect file type, validate size, and load document.
+        """
+
+        path, file_size_mb = self._check_file(file_path, self.MAX_FILE_SIZE_MB)
+
+        loader = self._get_loader(path)
+
         documents = loader.load()
 
 
@@ -82,6 +239,72 @@ class DataLoader:
 
         return documents
 
+    def iter_file(self, file_path: str) -> Iterator[Document]:
+        """
+        Like load_file, but yields documents (PDF pages) one at a time
+        from the loader's lazy_load(), so large files never sit in
+        memory as a whole.
+        """
+
+        path, file_size_mb = self._check_file(file_path, self.MAX_STREAM_FILE_SIZE_MB)
+
+        loader = self._get_loader(path)
+
+        for doc in loader.lazy_load():
+            doc.metadata["source_file"] = path.name
+            doc.metadata["file_size_mb"] = round(file_size_mb, 2)
+            yield doc
+
+    def load_files(
+        self,
+        file_paths: List[str],
+        max_workers: int = None
+    ) -> Tuple[Dict[str, List[Document]], Dict[str, str]]:
+        """
+        Parse many files in parallel across CPU cores.
+
+        Returns (documents, errors): documents maps each file that loaded
+        to its documents, errors maps each file that failed to the error
+        message, so one bad file does not fail the whole batch.
+        """
+
+        documents = {}
+        errors = {}
+
+        max_workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
+
+        # Not worth spawning a pool for a single file
+        if max_workers <= 1:
+            for file_path in file_paths:
+                try:
+                    documents[file_path] = self.load_file(file_path)
+                except Exception as e:
+                    errors[file_path] = f"{type(e).__name__}: {e}"
+            return documents, errors
+
+        # spawn: the parent process already holds torch / faiss threads
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(
+                    _load_file_worker, file_path, self.chunk_size, self.chunk_overlap, self.pdf_backend
+                ): file_path
+                for file_path in file_paths
+            }
+
+            for future in as_completed(futures):
+                file_path = futures[future]
+
+                try:
+                    documents[file_path] = future.result()
+                except Exception as e:
+                    errors[file_path] = f"{type(e).__name__}: {e}"
+
+        print(f"[INFO] Parsed {len(documents)} files ({len(errors)} failed) with {max_workers} processes")
+
+        return documents, errors
+
     def split_documents(self, documents: List[Document]) -> List[Document]:
         chunks = self.splitter.split_documents(documents)
 
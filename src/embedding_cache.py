@@ -0,0 +1,96 @@
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def file_hash(file_path: str, block_size: int = 1 << 20) -> str:
+
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache keyed by
+    (model, chunk hash). Re-ingesting a file, or a new revision that
+    shares most of its text, only encodes the chunks not seen before.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    chunk_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, chunk_hash)
+                )
+                """
+            )
+
+    def get_many(self, model: str, hashes: list) -> dict:
+        """
+        {hash: float32 vector} for the hashes present in the cache.
+        """
+        hashes = list(set(hashes))
+        found = {}
+
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings WHERE model = ? AND chunk_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+
+            for h, vector in rows:
+                found[h] = np.frombuffer(vector, dtype="float32")
+
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+
+        return found
+
+    def put_many(self, model: str, vectors: dict):
+        rows = [
+            (model, h, np.asarray(vector, dtype="float32").tobytes())
+            for h, vector in vectors.items()
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, chunk_hash, vector) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -1,47 +1,96 @@
-from typing import List, Any
+from typing import Any, Iterable, Iterator, List
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
 import numpy as np
-import torch
 import time
 
+from src.embedding_cache import EmbeddingCache, chunk_hash
+from src.metrics import observe_embedding
+from src.models import EMBEDDING_MODEL_NAME, INFERENCE_BACKEND, default_device, get_embedding_model
+
 
 class EmbeddingPipeline:
     def __init__(
         self,
-        model_name: str = "BAAI/bge-small-en-v1.5",
+        model_name: str = EMBEDDING_MODEL_NAME,
         chunk_size: int = 1000,
         chunk_overlap: int = 400,
-        use_gpu: bool = True
+        use_gpu: bool = True,
+        cache: EmbeddingCache = None
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
-        # Decide device
-        if use_gpu and torch.cuda.is_available():
-            device = "cuda"
-        else:
-            device = "cpu"
-        self.device = device
+        self.model_name = model_name
+        self.use_gpu = use_gpu
+        self._device = None
 
-        # Load model
-        self.model = SentenceTransformer(model_name, device=self.device)
-        print(f"[INFO] Loaded embedding model: {model_name} on {self.device}")
+        # Optional (model, chunk hash) → vector cache; the backend is part
+        # of the key because quantised models produce different vectors
+        self.cache = cache
+        self.cache_model_key = f"{model_name}@{INFERENCE_BACKEND}"
 
-    
-    # Chunk Documents
-    def chunk_documents(self, documents: List[Any]) -> List[Any]:
-        splitter = RecursiveCharacterTextSplitter(
+    @property
+    def device(self) -> str:
+        if self._device is None:
+            self._device = default_device(self.use_gpu)
+        return self._device
+
+    @property
+    def model(self):
+        # Shared model instance, loaded on first use (once per process)
+        return get_embedding_model(self.model_name, device=self.device)
+
+    def _splitter(self) -> RecursiveCharacterTextSplitter:
+        return RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", " ", ""]
         )
 
+    # Chunk Documents
+    def chunk_documents(self, documents: List[Any]) -> List[Any]:
+        splitter = self._splitter()
+
         chunks = splitter.split_documents(documents)
         # print(f"[INFO] Split {len(documents)} docs → {len(chunks)} chunks.")
         return chunks
 
+    def _encode(self, texts: List[str], show_progress_bar: bool = False):
+        """
+        Encode texts, reusing cached vectors for chunks seen before.
+        Returns (embeddings, number of texts served from the cache).
+        """
+        encode_kwargs = dict(
+            batch_size=32,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
+        if self.cache is None:
+            return self.model.encode(texts, **encode_kwargs), 0
+
+        hashes = [chunk_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.cache_model_key, hashes)
+
+        # Encode each unseen text once, even if it repeats in the batch
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors:
+                missing.setdefault(h, text)
+
+        if missing:
+            encoded = self.model.encode(list(missing.values()), **encode_kwargs)
+            new_vectors = dict(zip(missing.keys(), encoded))
+
+            self.cache.put_many(self.cache_model_key, new_vectors)
+            vectors.update(new_vectors)
+
+        n_cached = sum(1 for h in hashes if h not in missing)
+
+        return np.stack([vectors[h] for h in hashes]).astype("float32"), n_cached
+
     # -------------------------------
     # Generate Embeddings + Timing
     # -------------------------------
@@ -52,18 +101,49 @@ class EmbeddingPipeline:
 
         start_time = time.perf_counter()
 
-        embeddings = self.model.encode(
-    texts,
-    batch_size=32,
-    show_progress_bar=True,
-    convert_to_numpy=True,
-    normalize_embeddings=True
-)
+        embeddings, n_cached = self._encode(texts, show_progress_bar=True)
+
         end_time = time.perf_counter()
         total_time = end_time - start_time
 
-        print(f"[INFO] Embeddings shape: {embeddings.shape}")
+        observe_embedding(len(texts), total_time)
+
+        print(f"[INFO] Embeddings shape: {embeddings.shape} ({n_cached} reused from cache)")
         print(f"[⏱] Total Embedding Time: {total_time:.4f} seconds")
         print(f"[⚡] Avg Time per Chunk: {total_time / len(texts):.6f} sec")
 
         return embeddings
+
+    # -------------------------------
+    # Streaming: split + embed in batches
+    # -------------------------------
+    def iter_chunk_batches(self, documents: Iterable[Any], batch_size: int = 256) -> Iterator[List[Any]]:
+        """
+        Split documents (e.g. PDF pages) as they arrive and yield chunks
+        in lists of `batch_size`. Each document is split on its own, so
+        the chunks match chunk_documents() on the full list.
+        """
+        splitter = self._splitter()
+        batch = []
+
+        for document in documents:
+            batch.extend(splitter.split_documents([document]))
+
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+
+        if batch:
+            yield batch
+
+    def embed_batch(self, chunks: List[Any]) -> np.ndarray:
+        """
+        embed_chunks without the logging, for the streaming pipeline.
+        """
+        start_time = time.perf_counter()
+
+        embeddings, _ = self._encode([chunk.page_content for chunk in chunks])
+
+        observe_embedding(len(chunks), time.perf_counter() - start_time)
+
+        return embeddings
@@ -0,0 +1,299 @@
+import contextvars
+import queue
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+
+from src.data_loaders import DataLoader
+from src.embedding_cache import chunk_hash, file_hash
+from src.embeddings import EmbeddingPipeline
+from src.vectorstore import FaissVectorStore
+
+
+INGEST_STAGES = ["load", "chunk", "embed", "store"]
+STREAM_STAGES = ["parse", "embed", "store"]
+
+# Chunks per embed → store batch, and how many parsed batches may wait
+# for the embedder; together they bound the memory of a streaming upload
+STREAM_BATCH_SIZE = 256
+STREAM_QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+def _chunk_metadata(chunks, source: str) -> list:
+    return [
+        {
+            "text": c.page_content,
+            "page": c.metadata.get("page", "Unknown"),
+            "source": c.metadata.get("source_file", source),
+            "chunk_hash": chunk_hash(c.page_content)
+        }
+        for c in chunks
+    ]
+
+
+def _track(job, stage):
+    """
+    job.track(stage) when running as a background job, else a no-op.
+    """
+    if job is None:
+        return nullcontext()
+    return job.track(stage)
+
+
+class IngestionPipeline:
+    """
+    Load → chunk → embed → store for uploaded files.
+    """
+
+    def __init__(
+        self,
+        embedding_pipeline: EmbeddingPipeline,
+        vector_store: FaissVectorStore,
+        pdf_backend: str = "pymupdf",
+        pdf_workers: int = 1
+    ):
+        self.embedding_pipeline = embedding_pipeline
+        self.vector_store = vector_store
+        self.pdf_backend = pdf_backend
+        self.pdf_workers = pdf_workers
+
+    def _loader(self) -> DataLoader:
+        return DataLoader(pdf_backend=self.pdf_backend, pdf_workers=self.pdf_workers)
+
+    # DEDUPLICATION
+
+    def _duplicate_of(self, content_hash: str):
+        """
+        Source name of an already-ingested file with identical content.
+        """
+        return self.vector_store.find_file(content_hash)
+
+    def _new_chunks(self, chunks, stored: set, current: set) -> list:
+        """
+        Drop chunks whose text is already stored for the same source (or
+        repeats within this upload), so a new revision of a file only
+        adds what changed. Every hash seen is added to `current`, which
+        carries state across streaming batches.
+        """
+        new_chunks = []
+
+        for chunk in chunks:
+            h = chunk_hash(chunk.page_content)
+
+            if h not in stored and h not in current:
+                new_chunks.append(chunk)
+
+            current.add(h)
+
+        return new_chunks
+
+    def _remove_stale(self, source: str, stored: set, current: set) -> int:
+        """
+        Upsert: delete the chunks of the previous revision of `source`
+        that the new revision no longer contains.
+        """
+        stale = stored - current
+
+        if not stale:
+            return 0
+
+        return self.vector_store.delete_source(source, stale)
+
+    # INGESTION
+
+    def ingest_file(self, file_path: str, job=None) -> dict:
+        """
+        Blocking; meant to run on a worker. Pass a Job to report the
+        current stage and per-stage timings.
+        """
+        source = Path(file_path).name
+        content_hash = file_hash(file_path)
+
+        duplicate_of = self._duplicate_of(content_hash)
+        if duplicate_of is not None:
+            return {"source": source, "chunks": 0, "duplicate_of": duplicate_of}
+
+        with _track(job, "load"):
+            loader = self._loader()
+            documents = loader.load_file(file_path)
+
+        stored = self.vector_store.chunk_hashes(source)
+        current = set()
+
+        with _track(job, "chunk"):
+            chunks = self._new_chunks(self.embedding_pipeline.chunk_documents(documents), stored, current)
+
+        if chunks:
+            with _track(job, "embed"):
+                embeddings = self.embedding_pipeline.embed_chunks(chunks)
+
+            with _track(job, "store"):
+                self.vector_store.store(embeddings.astype("float32"), _chunk_metadata(chunks, source))
+
+        removed = self._remove_stale(source, stored, current)
+        self.vector_store.add_file(content_hash, source, len(current))
+
+        return {"source": source, "chunks": len(chunks), "removed": removed}
+
+    def ingest_file_streaming(self, file_path: str, batch_size: int = STREAM_BATCH_SIZE, job=None) -> dict:
+        """
+        Streaming variant of ingest_file: pages are parsed and split on a
+        producer thread while the caller's thread embeds and appends
+        fixed-size batches to the store. Parsing overlaps embedding, and
+        at most STREAM_QUEUE_SIZE batches are held in memory.
+        """
+        source = Path(file_path).name
+        content_hash = file_hash(file_path)
+
+        duplicate_of = self._duplicate_of(content_hash)
+        if duplicate_of is not None:
+            return {"source": source, "chunks": 0, "batches": 0, "duplicate_of": duplicate_of}
+
+        stored = self.vector_store.chunk_hashes(source)
+        current = set()
+        batches = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                documents = self._loader().iter_file(file_path)
+                chunk_batches = self.embedding_pipeline.iter_chunk_batches(documents, batch_size)
+
+                while not stop.is_set():
+                    with _track(job, "parse"):
+                        batch = next(chunk_batches, _DONE)
+
+                    batches.put(batch)
+
+                    if batch is _DONE:
+                        return
+
+            except Exception as e:
+                batches.put(e)
+
+        # The copied context keeps the parse spans in the job's trace
+        producer = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(produce,),
+            name="ingest-parse",
+            daemon=True
+        )
+        producer.start()
+
+        n_chunks = 0
+        n_batches = 0
+
+        try:
+            while True:
+                batch = batches.get()
+
+                if batch is _DONE:
+                    break
+
+                if isinstance(batch, Exception):
+                    raise batch
+
+                batch = self._new_chunks(batch, stored, current)
+
+                if not batch:
+                    continue
+
+                with _track(job, "embed"):
+                    embeddings = self.embedding_pipeline.embed_batch(batch)
+
+                with _track(job, "store"):
+                    self.vector_store.store(embeddings.astype("float32"), _chunk_metadata(batch, source))
+
+                n_chunks += len(batch)
+                n_batches += 1
+
+                if job is not None:
+                    job.update(chunks_stored=n_chunks, batches_stored=n_batches)
+
+        finally:
+            # Unblock the producer if we stopped early
+            stop.set()
+            while producer.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.1)
+
+        removed = self._remove_stale(source, stored, current)
+        self.vector_store.add_file(content_hash, source, len(current))
+
+        return {"source": source, "chunks": n_chunks, "batches": n_batches, "removed": removed}
+
+    def ingest_files(self, file_paths: list, max_workers: int = None, job=None) -> dict:
+        """
+        Parse the files in parallel (process pool), then chunk, embed and
+        store all of them in one shared pass. Files that fail to parse
+        are reported in "files" and skipped, as are files whose content
+        was already ingested.
+        """
+        files = []
+        hashes = {}
+        to_load = []
+
+        for file_path in file_paths:
+            content_hash = file_hash(file_path)
+            duplicate_of = self._duplicate_of(content_hash)
+
+            # Also catches the same file uploaded twice in one batch
+            if duplicate_of is None and content_hash in hashes.values():
+                duplicate_of = next(Path(p).name for p, h in hashes.items() if h == content_hash)
+
+            if duplicate_of is not None:
+                files.append({"source": Path(file_path).name, "chunks": 0, "duplicate_of": duplicate_of})
+                continue
+
+            hashes[file_path] = content_hash
+            to_load.append(file_path)
+
+        with _track(job, "load"):
+            loader = self._loader()
+            documents, errors = loader.load_files(to_load, max_workers=max_workers)
+
+        files.extend(
+            {"source": Path(file_path).name, "error": errors[file_path]}
+            for file_path in to_load
+            if file_path in errors
+        )
+
+        with _track(job, "chunk"):
+            chunks = []
+            loaded = []
+
+            for file_path in to_load:
+                if file_path not in documents:
+                    continue
+
+                source = Path(file_path).name
+                stored = self.vector_store.chunk_hashes(source)
+                current = set()
+
+                file_chunks = self._new_chunks(self.embedding_pipeline.chunk_documents(documents[file_path]), stored, current)
+                chunks.extend(file_chunks)
+
+                entry = {"source": source, "chunks": len(file_chunks)}
+                files.append(entry)
+                loaded.append((file_path, entry, stored, current))
+
+        if chunks:
+            with _track(job, "embed"):
+                embeddings = self.embedding_pipeline.embed_chunks(chunks)
+
+            with _track(job, "store"):
+                self.vector_store.store(embeddings.astype("float32"), _chunk_metadata(chunks, "Unknown"))
+
+        for file_path, entry, stored, current in loaded:
+            entry["removed"] = self._remove_stale(entry["source"], stored, current)
+            self.vector_store.add_file(hashes[file_path], entry["source"], len(current))
+
+        return {
+            "files": files,
+            "chunks": len(chunks),
+            "failed": len(errors)
+        }
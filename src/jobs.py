@@ -0,0 +1,164 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from src.tracing import NOOP_SPAN, tracer
+
+
+class Job:
+    """
+    State of one background job, as reported by GET /jobs/{id}.
+    """
+
+    def __init__(self, name: str, stages: list):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.stages = list(stages)
+
+        self.status = "queued"      # queued → running → completed | failed
+        self.stage = None
+        self.stage_timings = {}     # stage → ms
+        self.details = {}           # free-form counters, e.g. chunks stored
+        self.result = None
+        self.error = None
+
+        self.trace_id = None
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, stage: str):
+        """
+        Mark `stage` as running and record its duration.
+        """
+        with self._lock:
+            self.stage = stage
+
+        start = time.perf_counter()
+
+        try:
+            with tracer.span(f"ingest.{stage}"):
+                yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self.stage_timings[stage] = round(self.stage_timings.get(stage, 0) + elapsed, 2)
+
+    def update(self, **details):
+        with self._lock:
+            self.details.update(details)
+
+    @property
+    def progress(self) -> float:
+        if self.status == "completed":
+            return 1.0
+        if not self.stages:
+            return 0.0
+
+        done = sum(1 for stage in self.stages if stage in self.stage_timings and stage != self.stage)
+        return round(done / len(self.stages), 2)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "stage_timings_ms": dict(self.stage_timings),
+                "details": dict(self.details),
+                "result": self.result,
+                "error": self.error,
+                "trace_id": self.trace_id,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on a small worker pool and keeps the most recent
+    `max_jobs` of them for status polling.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="ingest-job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, stages: list, fn, *args, on_success=None, **kwargs) -> Job:
+        """
+        Queue fn(*args, job=job, **kwargs). Its return value becomes
+        job.result; on_success(job) runs afterwards on the worker.
+        """
+        job = Job(name, stages)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, args, kwargs, on_success)
+
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs, on_success):
+
+        job.status = "running"
+        job.started_at = time.time()
+
+        span = NOOP_SPAN
+
+        # One trace per job; stages tracked with job.track() are its spans.
+        # Set up inside the try, so a tracing error fails the job instead
+        # of leaving it "running"
+        with ExitStack() as stack:
+            try:
+                span = stack.enter_context(tracer.trace("job", job_id=job.id, job=job.name))
+                job.trace_id = span.trace_id
+
+                job.result = fn(*args, job=job, **kwargs)
+
+                if on_success is not None:
+                    on_success(job)
+
+                job.status = "completed"
+
+            except Exception as e:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+                span.error = job.error
+                print(f"[ERROR] Job {job.id} ({job.name}) failed: {job.error}")
+
+            finally:
+                job.stage = None
+                job.finished_at = time.time()
+
+    def _prune(self):
+        # Drop the oldest finished jobs once over the limit
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in ("completed", "failed"):
+                del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
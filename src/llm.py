@@ -0,0 +1,77 @@
+import asyncio
+import os
+import random
+from types import SimpleNamespace
+
+
+# "groq" or "mock" (local stand-in for load tests, no API calls)
+LLM_BACKENDS = ("groq", "mock")
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+MOCK_LLM_DELAY_MS = float(os.getenv("MOCK_LLM_DELAY_MS", 500))
+MOCK_LLM_JITTER_MS = float(os.getenv("MOCK_LLM_JITTER_MS", 0))
+MOCK_LLM_TOKENS = int(os.getenv("MOCK_LLM_TOKENS", 40))
+
+
+class MockLLMClient:
+    """
+    Local stand-in for the AsyncGroq chat completions API.
+
+    `chat.completions.create()` answers after `delay_ms` (± `jitter_ms`)
+    without any network call. With stream=True the answer arrives as
+    `tokens` deltas spread evenly over the same delay, so streaming and
+    non-streaming requests cost the same time.
+    """
+
+    def __init__(self, delay_ms: float = 500, jitter_ms: float = 0, tokens: int = 40):
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.tokens = max(1, tokens)
+        self.calls = 0
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _delay(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.delay_ms + jitter) / 1000
+
+    def _answer(self, model: str) -> list:
+        return [f"[mock {model}]"] + [f"token{i}" for i in range(1, self.tokens)]
+
+    async def _create(self, model: str, messages: list, stream: bool = False, **kwargs):
+        self.calls += 1
+
+        words = self._answer(model)
+        delay = self._delay()
+
+        if stream:
+            return self._stream(words, delay)
+
+        await asyncio.sleep(delay)
+
+        message = SimpleNamespace(content=" ".join(words))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, words: list, delay: float):
+        for i, word in enumerate(words):
+            await asyncio.sleep(delay / len(words))
+
+            delta = SimpleNamespace(content=word if i == 0 else " " + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def get_llm_client(backend: str = None):
+    """
+    Chat completions client for `backend` (default LLM_BACKEND).
+    """
+    backend = backend or LLM_BACKEND
+
+    if backend == "groq":
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+    if backend == "mock":
+        print(f"[INFO] Using mock LLM ({MOCK_LLM_DELAY_MS:.0f} ± {MOCK_LLM_JITTER_MS:.0f} ms)")
+        return MockLLMClient(MOCK_LLM_DELAY_MS, MOCK_LLM_JITTER_MS, MOCK_LLM_TOKENS)
+
+    raise ValueError(f"Unknown LLM backend: {backend} (expected one of {LLM_BACKENDS})")
@@ -0,0 +1,138 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+
+# Query stages run from a few ms (cache hit) to tens of seconds (LLM)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_latency_seconds",
+    "Query pipeline stage latency (stages: embed, retrieval, rerank, generation, total)",
+    ["endpoint", "stage", "cache"],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "rag_requests_in_flight",
+    "Requests currently being served",
+    ["endpoint"]
+)
+
+EMBEDDED_CHUNKS = Counter(
+    "rag_embedded_chunks_total",
+    "Chunks embedded at ingestion, embedding cache hits included"
+)
+
+EMBED_SECONDS = Counter(
+    "rag_chunk_embedding_seconds_total",
+    "Time spent embedding chunks at ingestion"
+)
+
+EMBED_THROUGHPUT = Gauge(
+    "rag_chunk_embedding_chunks_per_second",
+    "Chunks per second of the most recent ingestion embedding call"
+)
+
+
+def observe_stages(endpoint: str, cache: str = "miss", **stage_ms):
+    """
+    Record stage timings in ms, e.g. observe_stages("search", embed=3.1,
+    total=9.8). Only pass the stages that ran; `cache` is "miss",
+    "exact" or "semantic".
+    """
+    for stage, ms in stage_ms.items():
+        STAGE_LATENCY.labels(endpoint, stage, cache).observe(ms / 1000)
+
+
+def observe_embedding(n_chunks: int, seconds: float):
+    EMBEDDED_CHUNKS.inc(n_chunks)
+    EMBED_SECONDS.inc(seconds)
+
+    if seconds > 0:
+        EMBED_THROUGHPUT.set(n_chunks / seconds)
+
+
+class StatsCollector:
+    """
+    Exposes counters and sizes the app already keeps (cache stats(),
+    index sizes, stage queues) at scrape time instead of counting
+    everything twice.
+
+    `cache_stats()` returns {collection: {cache: stats dict}} using
+    the LRUCache / SemanticCache / EmbeddingCache stats() layout;
+    `index_stats()` returns {collection: {"vectors", "deleted",
+    "segments", "generation"}}; `stage_pool` is the StagePool.
+    """
+
+    def __init__(self, cache_stats, index_stats, stage_pool):
+        self.cache_stats = cache_stats
+        self.index_stats = index_stats
+        self.stage_pool = stage_pool
+
+    def collect(self):
+
+        lookups = CounterMetricFamily(
+            "rag_cache_lookups",
+            "Cache lookups by cache and result (response hits are exact or semantic)",
+            labels=["collection", "cache", "result"]
+        )
+        entries = GaugeMetricFamily("rag_cache_entries", "Cached entries", labels=["collection", "cache"])
+        invalidated = CounterMetricFamily(
+            "rag_cache_invalidated",
+            "Entries dropped because an index change could affect them",
+            labels=["collection", "cache"]
+        )
+
+        for collection, caches in self.cache_stats().items():
+            for cache, stats in caches.items():
+
+                if "exact_hits" in stats:
+                    lookups.add_metric([collection, cache, "exact_hit"], stats["exact_hits"])
+                    lookups.add_metric([collection, cache, "semantic_hit"], stats["semantic_hits"])
+                else:
+                    lookups.add_metric([collection, cache, "hit"], stats["hits"])
+
+                lookups.add_metric([collection, cache, "miss"], stats["misses"])
+
+                if "size" in stats:
+                    entries.add_metric([collection, cache], stats["size"])
+                if "invalidated" in stats:
+                    invalidated.add_metric([collection, cache], stats["invalidated"])
+
+        yield lookups
+        yield entries
+        yield invalidated
+
+        families = {
+            "vectors": GaugeMetricFamily("rag_index_vectors", "Vectors in the index, deleted ones included", labels=["collection"]),
+            "deleted": GaugeMetricFamily("rag_index_deleted_vectors", "Tombstoned vectors awaiting compaction", labels=["collection"]),
+            "segments": GaugeMetricFamily("rag_index_segments", "Index segments", labels=["collection"]),
+            "generation": GaugeMetricFamily("rag_index_generation", "Index changes since startup", labels=["collection"])
+        }
+
+        for collection, stats in self.index_stats().items():
+            for key, family in families.items():
+                family.add_metric([collection], stats[key])
+
+        yield from families.values()
+
+        waiting = GaugeMetricFamily("rag_stage_waiting", "Requests waiting for a stage's concurrency limit", labels=["stage"])
+        running = GaugeMetricFamily("rag_stage_running", "Requests inside a stage", labels=["stage"])
+
+        for stage in sorted(set(self.stage_pool.waiting) | set(self.stage_pool.running)):
+            waiting.add_metric([stage], self.stage_pool.waiting[stage])
+            running.add_metric([stage], self.stage_pool.running[stage])
+
+        yield waiting
+        yield running
+
+
+def register_collector(collector):
+    REGISTRY.register(collector)
+
+
+def render() -> tuple:
+    """
+    (body, content type) of the Prometheus text exposition.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,173 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+# INFERENCE BACKENDS
+#
+# torch     → PyTorch (default)
+# onnx      → ONNX Runtime, fp32
+# onnx-int8 → ONNX Runtime with dynamic int8 quantisation (CPU only);
+#             exported once into ONNX_MODEL_DIR and reused afterwards
+#
+# Check a backend against the PyTorch baseline with onnx_accuracy.py.
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_models")
+
+# arm64 / avx2 / avx512 / avx512_vnni — match the CPU of the serving nodes
+ONNX_QUANTIZATION_CONFIG = os.getenv("ONNX_QUANTIZATION_CONFIG", "avx2")
+
+MODEL_CLASSES = {
+    "embedding": "SentenceTransformer",
+    "reranker": "CrossEncoder"
+}
+
+
+# MODEL REGISTRY
+#
+# Every model is loaded once per process and shared by ingestion,
+# query encoding and vector search. Nothing is loaded at import:
+# torch / sentence_transformers are imported by the first load, which
+# main.py triggers from a background warm-up instead of at startup.
+
+_models = {}
+_lock = threading.Lock()
+
+
+def model_class(kind: str):
+    import sentence_transformers
+    return getattr(sentence_transformers, MODEL_CLASSES[kind])
+
+
+def default_device(use_gpu: bool = True) -> str:
+    import torch
+
+    if use_gpu and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+def onnx_export_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def quantized_file_suffix(config: str = ONNX_QUANTIZATION_CONFIG) -> str:
+    # Passed to the exporter explicitly: left to itself it names the file
+    # after the weight dtype, which is quint8 or qint8 depending on config
+    return f"int8_{config}"
+
+
+def quantized_file_name(config: str = ONNX_QUANTIZATION_CONFIG) -> str:
+    return f"onnx/model_{quantized_file_suffix(config)}.onnx"
+
+
+def export_quantized_onnx(kind: str, model_name: str, config: str = ONNX_QUANTIZATION_CONFIG) -> str:
+    """
+    Export `model_name` to ONNX and write a dynamically int8-quantised
+    copy next to it. Returns the local model directory.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = onnx_export_dir(model_name)
+    quantized_path = os.path.join(export_dir, quantized_file_name(config))
+
+    if os.path.exists(quantized_path):
+        return export_dir
+
+    print(f"[INFO] Exporting {model_name} to ONNX (int8, {config}) → {export_dir}")
+
+    model = model_class(kind)(model_name, device="cpu", backend="onnx")
+    model.save_pretrained(export_dir)
+
+    export_dynamic_quantized_onnx_model(
+        model,
+        quantization_config=config,
+        model_name_or_path=export_dir,
+        file_suffix=quantized_file_suffix(config)
+    )
+
+    return export_dir
+
+
+def _load(kind: str, model_name: str, device: str, backend: str):
+
+    cls = model_class(kind)
+
+    if backend == "torch":
+        return cls(model_name, device=device)
+
+    if backend == "onnx":
+        return cls(model_name, device=device, backend="onnx")
+
+    export_dir = export_quantized_onnx(kind, model_name)
+
+    return cls(
+        export_dir,
+        device="cpu",
+        backend="onnx",
+        model_kwargs={"file_name": quantized_file_name()}
+    )
+
+
+def _get_or_load(kind: str, model_name: str, device: str, backend: str):
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Choose from {BACKENDS}")
+
+    # Quantised ONNX models run on CPU only
+    if backend == "onnx-int8":
+        device = "cpu"
+
+    key = (kind, model_name, device, backend)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have loaded it while we waited
+        if key not in _models:
+            _models[key] = _load(kind, model_name, device, backend)
+            print(f"[INFO] Loaded {kind} model: {model_name} on {device} ({backend})")
+
+        return _models[key]
+
+
+def get_embedding_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    device: str = None,
+    backend: str = None
+) -> "SentenceTransformer":
+    return _get_or_load("embedding", model_name, device or default_device(), backend or INFERENCE_BACKEND)
+
+
+def get_reranker(
+    model_name: str = RERANK_MODEL_NAME,
+    device: str = None,
+    backend: str = None
+) -> "CrossEncoder":
+    return _get_or_load("reranker", model_name, device or default_device(), backend or INFERENCE_BACKEND)
+
+
+def encode_queries(texts, model_name: str = EMBEDDING_MODEL_NAME, backend: str = None):
+    """
+    Normalised float32 query embeddings, shape (len(texts), dim).
+    """
+    model = get_embedding_model(model_name, backend=backend)
+
+    return model.encode(
+        list(texts),
+        batch_size=32,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    ).astype("float32")
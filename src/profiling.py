@@ -0,0 +1,226 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Leaf frames in these files mean the thread is blocked (idle pool
+# workers, the event loop waiting in select), not doing work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """
+    Folded stacks sampled while one profiled request was running.
+    """
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration_ms = 0.0
+        self._start = time.perf_counter()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: one daemon thread samples the stack of every
+    other thread each `interval_ms` and counts them as folded stacks
+    ("thread;outer;...;leaf count", the input format of flamegraph.pl
+    and speedscope). Blocked threads are skipped unless `include_idle`.
+
+    The sampler is shared: open() starts a Profile, and every sample is
+    added to all open profiles. The thread runs only while a profile is
+    open, and at most `max_open` are open at once (open() returns None
+    beyond that), so profiling costs one sampler however many requests
+    are sampled.
+
+    Samples cover the whole process, including the stage / shard
+    worker threads, so requests running concurrently with a profiled
+    one appear in its profile too.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, include_idle: bool = False, max_open: int = 4):
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.max_open = max_open
+
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def open(self):
+        with self._lock:
+            if len(self._profiles) >= self.max_open:
+                return None
+
+            profile = Profile()
+            self._profiles.add(profile)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+
+        return profile
+
+    def close(self, profile: Profile) -> Profile:
+        with self._lock:
+            self._profiles.discard(profile)
+
+        profile.duration_ms = (time.perf_counter() - profile._start) * 1000
+        return profile
+
+    def _sample(self, own_id: int) -> list:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+
+            if not self.include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+
+            labels.append(names.get(thread_id, str(thread_id)))
+            stacks.append(";".join(reversed(labels)))
+
+        return stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+
+        while True:
+            time.sleep(self.interval)
+
+            with self._lock:
+                if not self._profiles:
+                    # Stop with the last profile; open() starts a new thread
+                    self._thread = None
+                    return
+
+            stacks = self._sample(own_id)
+
+            with self._lock:
+                for profile in self._profiles:
+                    profile.samples += 1
+                    profile.stacks.update(stacks)
+
+
+class ProfileManager:
+    """
+    Admin switch for request profiling. While `fraction` > 0, that
+    share of requests is profiled by the shared SamplingProfiler (at
+    most `max_open` at a time). Each profile is kept in memory (the
+    last `keep`) and written to `directory/<profile id>.folded` by a
+    background writer, so finish() does no file I/O on the caller.
+    """
+
+    def __init__(self, directory: str = "profiles", keep: int = 50, max_open: int = 4):
+        self.directory = directory
+        self.keep = keep
+
+        self.fraction = 0.0
+        self.interval_ms = 5.0
+        self.sampler = SamplingProfiler(self.interval_ms, max_open=max_open)
+
+        self._profiles = OrderedDict()   # id → (summary, folded stacks)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+    def configure(self, fraction: float, interval_ms: float = None):
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("fraction must be between 0 and 1")
+        if interval_ms is not None and interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+
+        self.fraction = fraction
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+            self.sampler.interval = interval_ms / 1000
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.fraction > 0,
+            "fraction": self.fraction,
+            "interval_ms": self.interval_ms,
+            "max_concurrent": self.sampler.max_open,
+            "stored": len(self._profiles),
+            "directory": self.directory
+        }
+
+    def maybe_start(self):
+        """
+        An open Profile for a sampled request, else None (also when
+        max_open requests are already being profiled).
+        """
+        if self.fraction <= 0 or random.random() >= self.fraction:
+            return None
+        return self.sampler.open()
+
+    def finish(self, profile_id: str, profile: Profile, **meta) -> dict:
+        self.sampler.close(profile)
+        folded = profile.folded()
+
+        summary = {
+            "profile_id": profile_id,
+            "created_at": time.time(),
+            "duration_ms": round(profile.duration_ms, 2),
+            "samples": profile.samples,
+            "interval_ms": self.sampler.interval * 1000,
+            **meta
+        }
+
+        with self._lock:
+            self._profiles[profile_id] = (summary, folded)
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+        self._writer.submit(self._write, profile_id, folded)
+
+        return summary
+
+    def _write(self, profile_id: str, folded: str):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{profile_id}.folded"), "w") as f:
+                f.write(folded)
+        except OSError as e:
+            print(f"[WARN] Could not write profile {profile_id}: {e}")
+
+    def list(self) -> list:
+        with self._lock:
+            return [summary for summary, _ in reversed(self._profiles.values())]
+
+    def get(self, profile_id: str):
+        """
+        Folded stacks of a profile, from memory or the profile directory.
+        """
+        with self._lock:
+            if profile_id in self._profiles:
+                return self._profiles[profile_id][1]
+
+        path = os.path.join(self.directory, f"{os.path.basename(profile_id)}.folded")
+
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read()
+
+        return None
+
+    def shutdown(self):
+        self._writer.shutdown(wait=True)
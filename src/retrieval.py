@@ -0,0 +1,43 @@
+import re
+
+
+# KEYWORD QUERIES
+
+_TERM = re.compile(r"[\w][\w\-./']*")
+
+
+def keyword_terms(text: str) -> list:
+    """
+    Whitespace/punctuation separated query terms, lower-cased, keeping
+    identifiers such as "14.2", "123-456-789" or "b-12/3" whole.
+    """
+    terms = (term.rstrip(".-/'") for term in _TERM.findall((text or "").lower()))
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 MATCH expression OR-ing every term as a quoted phrase, so
+    "123-456-789" matches that exact token sequence and no query
+    text is parsed as FTS syntax.
+    """
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in keyword_terms(text))
+
+
+# RANK FUSION
+
+def reciprocal_rank_fusion(ranked_lists: list, k: int = 60, top_n: int = None) -> list:
+    """
+    Merge ranked id lists (best first) into one: each id scores
+    sum(1 / (k + rank)) over the lists it appears in. Returns
+    [(id, score)] best first, cut to `top_n` when given.
+    """
+    scores = {}
+
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+
+    fused = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+    return fused[:top_n] if top_n else fused
@@ -0,0 +1,110 @@
+import threading
+import time
+
+
+class WarmUp:
+    """
+    Named warm-up steps (model loads, a dummy encode / rerank) run once,
+    in order, on a background thread, so the process can answer health
+    checks while models load and the first real query does not pay for
+    lazy initialisation.
+
+    `ready` turns True when every step has succeeded. A failing step
+    (e.g. a transient model download error) is retried up to `retries`
+    times, waiting `backoff_s`, then twice that, ... up to
+    `max_backoff_s`; after that the warm-up gives up, `failed` turns
+    True and the process should report itself unhealthy so it gets
+    restarted. Requests that arrive earlier still work, they just load
+    what they need themselves.
+    """
+
+    def __init__(self, steps: list, retries: int = 5, backoff_s: float = 1.0, max_backoff_s: float = 30.0):
+        self.steps = list(steps)   # [(name, fn)]
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+
+        self.state = "pending"     # pending → running → ready / failed
+        self.results = {}          # name → {"status", "ms", "error"}
+        self.elapsed_ms = None
+
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def failed(self) -> bool:
+        return self.state == "failed"
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run(self):
+        self.state = "running"
+        start = time.perf_counter()
+
+        for name, fn in self.steps:
+            if not self._run_step(name, fn):
+                self.state = "failed"
+                self.elapsed_ms = (time.perf_counter() - start) * 1000
+                print(f"[ERROR] Warm-up gave up after {self.retries + 1} attempts at {name}")
+                return
+
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+        self.state = "ready"
+        self._ready.set()
+
+        print(f"[INFO] Warm-up finished in {self.elapsed_ms:.0f} ms")
+
+    def _run_step(self, name: str, fn) -> bool:
+        step_start = time.perf_counter()
+        delay = self.backoff_s
+
+        for attempt in range(1, self.retries + 2):
+            try:
+                fn()
+            except Exception as e:
+                self.results[name] = {
+                    "status": "retrying" if attempt <= self.retries else "failed",
+                    "attempts": attempt,
+                    "ms": round((time.perf_counter() - step_start) * 1000, 2),
+                    "error": f"{type(e).__name__}: {e}"
+                }
+                print(f"[WARN] Warm-up step {name} failed (attempt {attempt}): {e}")
+
+                if attempt <= self.retries:
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff_s)
+                continue
+
+            self.results[name] = {
+                "status": "done",
+                "attempts": attempt,
+                "ms": round((time.perf_counter() - step_start) * 1000, 2)
+            }
+            return True
+
+        return False
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "state": self.state,
+            "elapsed_ms": round(self.elapsed_ms, 2) if self.elapsed_ms is not None else None,
+            "steps": {
+                name: self.results.get(name, {"status": "pending"})
+                for name, _ in self.steps
+            }
+        }
@@ -0,0 +1,333 @@
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# Comma-separated exporters: "jsonl" (TRACE_FILE) and/or "otlp"
+# (OTLP/HTTP JSON to OTLP_ENDPOINT). Empty: traces stay in memory only.
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces/traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+SERVICE_NAME = os.getenv("SERVICE_NAME", "real-estate-doc-intelligence")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation. Ends once; attributes can be added until then.
+    """
+
+    def __init__(self, tracer, name: str, trace_id: str, parent_id: str = None, attrs: dict = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attrs = dict(attrs or {})
+        self.error = None
+
+        self.start_time = time.time()
+        self.duration_ms = None
+        self._start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, error: str = None):
+        if self.duration_ms is not None:
+            return
+
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.error = error or self.error
+        self.tracer._finish(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    trace_id = None
+    span_id = None
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Structured spans with trace ids for the query and ingestion paths.
+
+    trace(name) opens a root span under a new trace id; span(name)
+    opens a child of the current span. The current span lives in a
+    contextvar, so it follows a request across awaits and asyncio
+    tasks, and into worker threads started through
+    contextvars.copy_context() (StagePool, shard fan-out, ingestion
+    producers). Outside a trace span() is a no-op, so library code is
+    instrumented unconditionally.
+
+    When a root span ends its trace is complete: it is kept in memory
+    (the last `keep` traces, for /admin/traces/{id}) and handed to the
+    exporters on a background thread, never on the request path.
+    """
+
+    def __init__(self, exporters: list = (), keep: int = 200):
+        self.exporters = list(exporters)
+        self.keep = keep
+
+        self._open = {}                 # trace id → finished spans of a running trace
+        self._finished = OrderedDict()  # trace id → spans, most recent last
+        self._lock = threading.Lock()
+
+        self._queue = queue.Queue(maxsize=10_000)
+        self.dropped = 0
+
+        if self.exporters:
+            threading.Thread(target=self._export_loop, name="trace-export", daemon=True).start()
+
+    # SPANS
+
+    def start_trace(self, name: str, /, **attrs) -> Span:
+        """
+        Root span of a new trace; activate() it to make it current.
+        """
+        return Span(self, name, secrets.token_hex(16), None, attrs)
+
+    def activate(self, span: Span):
+        return _current_span.set(span)
+
+    def deactivate(self, token):
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Token from another context (e.g. a generator resumed elsewhere)
+            pass
+
+    @contextmanager
+    def trace(self, name: str, /, **attrs):
+        span = self.start_trace(name, **attrs)
+        token = self.activate(span)
+
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.deactivate(token)
+            span.end()
+
+    @contextmanager
+    def span(self, name: str, /, **attrs):
+        parent = _current_span.get()
+
+        if parent is None:
+            yield NOOP_SPAN
+            return
+
+        span = Span(self, name, parent.trace_id, parent.span_id, attrs)
+        token = self.activate(span)
+
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.deactivate(token)
+            span.end()
+
+    def current_trace_id(self):
+        span = _current_span.get()
+        return span.trace_id if span is not None else None
+
+    # COLLECTION
+
+    def _finish(self, span: Span):
+        record = span.to_dict()
+        export = None
+
+        with self._lock:
+            if span.trace_id in self._finished:
+                # Straggler (e.g. a background task) after its root ended
+                self._finished[span.trace_id].append(record)
+                export = [record]
+
+            else:
+                self._open.setdefault(span.trace_id, []).append(record)
+
+                if span.parent_id is None:
+                    spans = self._open.pop(span.trace_id)
+                    self._finished[span.trace_id] = spans
+                    export = list(spans)
+
+                    while len(self._finished) > self.keep:
+                        self._finished.popitem(last=False)
+
+        if self.exporters and export:
+            try:
+                self._queue.put_nowait(export)
+            except queue.Full:
+                self.dropped += 1
+
+    def get_trace(self, trace_id: str):
+        with self._lock:
+            spans = self._finished.get(trace_id)
+            return list(spans) if spans is not None else None
+
+    def recent(self, limit: int = 50) -> list:
+        """
+        Summaries of the most recent finished traces, newest first.
+        """
+        with self._lock:
+            traces = list(self._finished.items())[-limit:]
+
+        summaries = []
+
+        for trace_id, spans in reversed(traces):
+            root = next((span for span in spans if span["parent_id"] is None), spans[-1])
+            summaries.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "start": root["start"],
+                "duration_ms": root["duration_ms"],
+                "spans": len(spans),
+                "error": root["error"]
+            })
+
+        return summaries
+
+    # EXPORT
+
+    def _export_loop(self):
+        while True:
+            spans = self._queue.get()
+
+            # Coalesce whatever else is waiting into one export call
+            while len(spans) < 512:
+                try:
+                    spans.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for exporter in self.exporters:
+                try:
+                    exporter.export(spans)
+                except Exception as e:
+                    print(f"[WARN] Trace export to {type(exporter).__name__} failed: {e}")
+
+
+class JsonlExporter:
+    """
+    One JSON object per span, appended to `path`.
+    """
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: list):
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """
+    OTLP/HTTP with JSON encoding, e.g. to an OpenTelemetry Collector
+    or Jaeger on port 4318.
+    """
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, service_name: str = SERVICE_NAME, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def _span(self, span: dict) -> dict:
+        start_ns = int(span["start"] * 1e9)
+        attrs = dict(span["attrs"], thread=span["thread"])
+
+        otlp = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 2 if span["parent_id"] is None else 1,   # SERVER / INTERNAL
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(span["duration_ms"] * 1e6)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attrs.items()],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1}
+        }
+
+        if span["parent_id"] is not None:
+            otlp["parentSpanId"] = span["parent_id"]
+
+        return otlp
+
+    def export(self, spans: list):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "rag"}, "spans": [self._span(span) for span in spans]}]
+            }]
+        }
+
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def exporters_from_env(export: str = TRACE_EXPORT) -> list:
+    exporters = []
+
+    for name in filter(None, (part.strip() for part in export.split(","))):
+        if name == "jsonl":
+            exporters.append(JsonlExporter(TRACE_FILE))
+        elif name == "otlp":
+            exporters.append(OtlpHttpExporter(OTLP_ENDPOINT))
+        else:
+            raise ValueError(f"Unknown trace exporter: {name} (expected jsonl and/or otlp)")
+
+    return exporters
+
+
+# Shared by the app and src/ modules
+tracer = Tracer(exporters_from_env())
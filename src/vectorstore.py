@@ -1,104 +1,1003 @@
 import os
+import json
+import math
+import shutil
+import threading
 import faiss
-import pickle
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import torch
 
+from src.chunkstore import ChunkStore
+from src.models import EMBEDDING_MODEL_NAME, encode_queries
+from src.retrieval import reciprocal_rank_fusion
+from src.tracing import tracer
 
-## Checks GPU 
-if torch.cuda.is_available():
-    device = "cuda"
-else:
-    device = "cpu"
 
-embedding_model = SentenceTransformer(
-    "BAAI/bge-small-en-v1.5",
-    device=device
-)
+# INDEX TYPES
+#
+# flat  → exact brute-force inner product (cosine on normalised vectors)
+# hnsw  → graph based ANN, no training, tuned with efSearch
+# ivf   → inverted lists over k-means centroids, tuned with nprobe
+# ivfpq → IVF with product-quantised codes, smallest memory footprint
 
-print(f"[INFO] Query embedding model loaded on {device}")
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+# Filters matching at most this many ids use an IDSelectorBatch (a hash
+# set of the ids, built in O(matches)); larger ones an id bitmap, whose
+# O(n_ids) build is cheaper than hashing that many ids
+BATCH_SELECTOR_MAX_IDS = 4096
+
+
+def default_nlist(n_vectors: int) -> int:
+    """
+    Rule of thumb for IVF: ~4 * sqrt(N) centroids, while keeping
+    at least 39 training points per centroid (faiss warns below that).
+    """
+    nlist = int(4 * math.sqrt(max(n_vectors, 1)))
+    nlist = min(nlist, max(n_vectors // 39, 1))
+    return max(nlist, 1)
+
+
+def build_index(
+    index_type: str,
+    vectors: np.ndarray,
+    ids: np.ndarray = None,
+    nlist: int = None,
+    pq_m: int = 16,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200
+):
+    """
+    Build (and train when required) a faiss index of the given type
+    over `vectors`. All index types use inner product so scores stay
+    comparable with the exact IndexFlatIP.
+
+    When `ids` is given the index is wrapped in an IndexIDMap so search
+    returns those ids instead of insertion positions.
+    """
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown index type: {index_type}. Choose from {INDEX_TYPES}"
+        )
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    dimension = vectors.shape[1]
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(
+            dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = ef_construction
+
+    else:
+        nlist = nlist or default_nlist(vectors.shape[0])
+        quantizer = faiss.IndexFlatIP(dimension)
+
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(
+                quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            if dimension % pq_m != 0:
+                raise ValueError(
+                    f"pq_m={pq_m} must divide the embedding dimension {dimension}"
+                )
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, pq_m, pq_bits,
+                faiss.METRIC_INNER_PRODUCT
+            )
+
+        print(f"[INFO] Training {index_type} index (nlist={nlist}) on {vectors.shape[0]} vectors...")
+        index.train(vectors)
+
+    if ids is None:
+        index.add(vectors)
+        return index
+
+    index = faiss.IndexIDMap(index)
+    index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype="int64"))
+
+    return index
+
+
+def index_kind(index) -> str:
+    """
+    Map a faiss index instance back to one of INDEX_TYPES.
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def search_params(index, nprobe: int = None, ef_search: int = None, sel=None):
+    """
+    Per-query search parameters, so nprobe / efSearch can be tuned
+    at query time without mutating the shared index. `sel` is an
+    optional faiss IDSelector over vector ids (e.g. to skip tombstones).
+    """
+    kind = index_kind(index)
+    extra = {"sel": sel} if sel is not None else {}
+
+    if kind == "hnsw" and ef_search:
+        return faiss.SearchParametersHNSW(efSearch=ef_search, **extra)
+
+    if kind in ("ivf", "ivfpq") and nprobe:
+        return faiss.SearchParametersIVF(nprobe=nprobe, **extra)
+
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+
+    return None
+
+
+class Segment:
+    """
+    One immutable piece of the store on disk:
+
+        segments/<name>/faiss.index  → index over the segment (ids = vector ids)
+        segments/<name>/vectors.npy  → raw float32 vectors, used by compaction
+        segments/<name>/ids.npy      → vector ids, aligned with vectors.npy
+
+    Uploads only ever write a new segment, so their cost depends on the
+    size of the new document, not on the size of the corpus.
+    """
+
+    def __init__(self, path: str, index):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.index = index
+
+        self.index_path = os.path.join(path, "faiss.index")
+        self.vectors_path = os.path.join(path, "vectors.npy")
+        self.ids_path = os.path.join(path, "ids.npy")
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @classmethod
+    def create(cls, path: str, index_type: str, vectors: np.ndarray, ids: np.ndarray, **index_kwargs):
+
+        index = build_index(index_type, vectors, ids=ids, **index_kwargs)
+
+        # Written to a temp dir first so a crash never leaves half a segment
+        tmp_path = path + ".tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        faiss.write_index(index, os.path.join(tmp_path, "faiss.index"))
+        np.save(os.path.join(tmp_path, "vectors.npy"), np.ascontiguousarray(vectors, dtype="float32"))
+        np.save(os.path.join(tmp_path, "ids.npy"), np.ascontiguousarray(ids, dtype="int64"))
+
+        os.replace(tmp_path, path)
+
+        return cls(path, index)
+
+    @classmethod
+    def load(cls, path: str):
+        return cls(path, faiss.read_index(os.path.join(path, "faiss.index")))
+
+    def read_vectors(self):
+        """
+        (ids, vectors), memory-mapped so compaction does not hold
+        every segment in RAM at once.
+        """
+        return (
+            np.load(self.ids_path, mmap_mode="r"),
+            np.load(self.vectors_path, mmap_mode="r")
+        )
+
+    def search(self, query_embeddings: np.ndarray, top_k: int, nprobe: int = None, ef_search: int = None, sel=None):
+        params = search_params(self.index, nprobe=nprobe, ef_search=ef_search, sel=sel)
+        return self.index.search(query_embeddings, top_k, params=params)
+
+
+def _page_number(page) -> int:
+    # Same normalisation as the chunk store ("Unknown" → 0)
+    return int(page) if str(page).isdigit() else 0
+
+
+class IdRangeIndex:
+    """
+    (source, page) → runs of consecutive vector ids. Chunks are stored
+    in id order, so a document is a handful of runs, and a metadata
+    filter becomes an id mask with a few vectorised numpy operations
+    instead of a chunk store query.
+    """
+
+    def __init__(self, runs: list = ()):
+        self.codes = {}                                 # source → int code
+        self.table = np.empty((0, 4), dtype="int64")    # code, page, start, end
+        self._append(runs)
+
+    def _append(self, runs):
+        rows = []
+
+        for source, page, start, end in runs:
+            code = self.codes.setdefault(source, len(self.codes))
+            rows.append((code, page, start, end))
+
+        if rows:
+            # Replaced, never mutated, so readers can keep a snapshot
+            self.table = np.vstack([self.table, np.asarray(rows, dtype="int64")])
+
+    def add(self, start_id: int, metadata: list):
+        runs = []
+
+        for offset, meta in enumerate(metadata):
+            source = meta.get("source", "Unknown")
+            page = _page_number(meta.get("page", 0))
+            vector_id = start_id + offset
+
+            if runs and runs[-1][0] == source and runs[-1][1] == page:
+                runs[-1][3] = vector_id + 1
+            else:
+                runs.append([source, page, vector_id, vector_id + 1])
+
+        self._append(runs)
+
+    def drop_source(self, source: str):
+        code = self.codes.get(source)
+
+        if code is not None:
+            self.table = self.table[self.table[:, 0] != code]
+
+    def runs(self, sources: list = None, page_min: int = None, page_max: int = None) -> np.ndarray:
+        """
+        (start, end) id runs of the chunks matching the filter.
+        """
+        table = self.table
+        keep = np.ones(len(table), dtype=bool)
+
+        if sources is not None:
+            codes = [self.codes[source] for source in sources if source in self.codes]
+            keep &= np.isin(table[:, 0], codes)
+        if page_min is not None:
+            keep &= table[:, 1] >= page_min
+        if page_max is not None:
+            keep &= table[:, 1] <= page_max
+
+        return table[keep][:, 2:4]
+
+
+def runs_mask(runs: np.ndarray, n_ids: int) -> np.ndarray:
+    """
+    Boolean mask over vector ids [0, n_ids) covered by (start, end) runs.
+    """
+    # +1 at each run start, -1 at each run end; ids inside a run sum to > 0
+    delta = np.zeros(n_ids + 1, dtype="int32")
+    np.add.at(delta, np.minimum(runs[:, 0], n_ids), 1)
+    np.add.at(delta, np.minimum(runs[:, 1], n_ids), -1)
+
+    return np.cumsum(delta[:-1]) > 0
 
 
 class FaissVectorStore:
-    def __init__(self, persist_dir: str = "faiss_store"):
+    def __init__(
+        self,
+        persist_dir: str = "faiss_store",
+        index_type: str = "flat",
+        ann_threshold: int = 50_000,
+        nlist: int = None,
+        pq_m: int = 16,
+        hnsw_m: int = 32,
+        nprobe: int = 16,
+        ef_search: int = 64,
+        compress_text: bool = False,
+        max_segments: int = 8,
+        max_deleted_fraction: float = 0.2,
+        embedding_model_name: str = EMBEDDING_MODEL_NAME
+    ):
+        """
+        index_type    → target index ("flat", "hnsw", "ivf", "ivfpq")
+        ann_threshold → segments stay on exact IndexFlatIP until they hold
+                        this many vectors; larger ones are built as
+                        `index_type`
+        nprobe        → default IVF lists probed per query
+        ef_search     → default HNSW candidate list size per query
+        compress_text → zstd-compress chunk text in the chunk store
+        max_segments  → a background compaction merges all segments once
+                        more than this many exist
+        max_deleted_fraction → ... or once this share of the stored
+                        vectors are tombstones of deleted chunks
+        embedding_model_name → model used when search() gets raw query text;
+                        must match the model used for the stored vectors
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type: {index_type}. Choose from {INDEX_TYPES}"
+            )
+
         self.persist_dir = persist_dir
         os.makedirs(self.persist_dir, exist_ok=True)
 
-        self.index = None
-        self.metadata = []
+        self.index_type = index_type
+        self.ann_threshold = ann_threshold
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.max_segments = max_segments
+        self.max_deleted_fraction = max_deleted_fraction
+        self.embedding_model_name = embedding_model_name
+
+        # Replaced (never mutated) under the lock, so searches can iterate
+        # a snapshot while store() / compaction run
+        self.segments = []
+        self.next_id = 0
+        self.next_segment = 0
+        self._loaded = False
+
+        # Vector ids of deleted chunks, skipped at search time through an
+        # IDSelector until compaction drops them from the segments
+        self.tombstones = np.empty(0, dtype="int64")
+        self._selector = None
+
+        # Bumped on every store() / delete, so callers can tell whether
+        # anything they computed from a search may have gone stale
+        self.generation = 0
+        self._listeners = []
+
+        # Source / page → vector id runs, for filtered search
+        self.id_ranges = IdRangeIndex()
 
+        self._lock = threading.RLock()
+
+        # One compaction at a time: two would merge the same segments
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+
+        self.segments_dir = os.path.join(self.persist_dir, "segments")
+        self.manifest_path = os.path.join(self.persist_dir, "manifest.json")
         self.index_path = os.path.join(self.persist_dir, "faiss.index")
         self.meta_path = os.path.join(self.persist_dir, "metadata.pkl")
+        self.chunks_path = os.path.join(self.persist_dir, "chunks.db")
+
+        os.makedirs(self.segments_dir, exist_ok=True)
+
+        # Chunk text / page / source keyed by vector id
+        self.chunk_store = ChunkStore(self.chunks_path, compress=compress_text)
+
+    @property
+    def ntotal(self) -> int:
+        self._ensure_loaded()
+        return sum(segment.ntotal for segment in self.segments)
+
+    def _index_kwargs(self) -> dict:
+        return {"nlist": self.nlist, "pq_m": self.pq_m, "hnsw_m": self.hnsw_m}
+
+    def _segment_type(self, n_vectors: int) -> str:
+        if n_vectors >= self.ann_threshold:
+            return self.index_type
+        return "flat"
+
+    def _new_segment_path(self) -> str:
+        name = f"seg_{self.next_segment:06d}"
+        self.next_segment += 1
+        return os.path.join(self.segments_dir, name)
+
+    # CHANGE NOTIFICATION
+
+    def add_listener(self, fn):
+        """
+        Call fn(change) after every store() and delete, where change is
+        {"generation", "sources", "embeddings", "texts", "deleted"}: the
+        sources touched, the newly stored vectors and chunk texts (None
+        for deletes) and whether chunks were removed.
+        """
+        self._listeners.append(fn)
+
+    def _notify(self, sources: set, embeddings: np.ndarray = None, texts: list = None, deleted: bool = False):
+        with self._lock:
+            self.generation += 1
+            change = {
+                "generation": self.generation,
+                "sources": sources,
+                "embeddings": embeddings,
+                "texts": texts,
+                "deleted": deleted
+            }
+
+        for fn in self._listeners:
+            fn(change)
+
+    # MANIFEST
+
+    def _write_manifest(self):
+        manifest = {
+            "next_id": self.next_id,
+            "next_segment": self.next_segment,
+            "segments": [segment.name for segment in self.segments]
+        }
+
+        tmp_path = self.manifest_path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+
+        os.replace(tmp_path, self.manifest_path)
+
+    def _migrate_single_index(self):
+        """
+        Stores written before segments existed have one faiss.index whose
+        positions are the vector ids; it becomes the first segment.
+        """
+        index = faiss.read_index(self.index_path)
+
+        if isinstance(index, faiss.IndexIVF):
+            index.make_direct_map()
+
+        vectors = index.reconstruct_n(0, index.ntotal)
+        ids = np.arange(index.ntotal, dtype="int64")
+
+        segment = Segment.create(
+            self._new_segment_path(),
+            index_kind(index),
+            vectors,
+            ids,
+            **self._index_kwargs()
+        )
+
+        self.segments = [segment]
+        self.next_id = index.ntotal
+        self._write_manifest()
 
-    # STORE (Append Mode) 
+        os.replace(self.index_path, self.index_path + ".migrated")
+
+        print(f"[INFO] Migrated {index.ntotal} vectors from {self.index_path} into {segment.name}")
+
+    # STORE (Append Mode)
     def store(self, embeddings: np.ndarray, metadata: list):
 
         embeddings = embeddings.astype("float32")
-        dimension = embeddings.shape[1]
+        n_vectors = embeddings.shape[0]
 
-        # If index already exists → load and append
-        if os.path.exists(self.index_path) and os.path.exists(self.meta_path):
-            self.load()
-            self.index.add(embeddings)
-            self.metadata.extend(metadata)
+        self._ensure_loaded()
+
+        with self._lock:
+            start_id = self.next_id
+            ids = np.arange(start_id, start_id + n_vectors, dtype="int64")
+
+            # Only the new rows are written, keyed by vector id
+            self.chunk_store.add(start_id, metadata)
+            self.id_ranges.add(start_id, metadata)
+
+            # New vectors go into their own delta segment
+            segment = Segment.create(
+                self._new_segment_path(),
+                self._segment_type(n_vectors),
+                embeddings,
+                ids,
+                **self._index_kwargs()
+            )
+
+            self.segments = self.segments + [segment]
+            self.next_id = start_id + n_vectors
+            self._write_manifest()
+
+            n_segments = len(self.segments)
+
+        self._notify(
+            {meta.get("source", "Unknown") for meta in metadata},
+            embeddings=embeddings,
+            texts=[meta.get("text") or "" for meta in metadata]
+        )
+
+        print(f"[INFO] Appended {n_vectors} vectors as {segment.name}.")
+        print(f"[INFO] Total vectors in index: {self.ntotal} across {n_segments} segments")
+
+        if n_segments > self.max_segments:
+            self.compact_in_background()
+
+    # COMPACTION
+
+    def compact(self):
+        """
+        Merge every current segment into one, dropping the vectors of
+        deleted chunks. The merged segment is built outside the lock;
+        segments appended and chunks deleted meanwhile are kept as they are.
+        Waits for a compaction already running.
+        """
+        self._ensure_loaded()
+
+        with self._compaction_lock:
+            self._compact()
+
+    def _compact(self):
+
+        with self._lock:
+            merging = list(self.segments)
+            tombstones = self.tombstones
+
+        if len(merging) < 2 and not tombstones.size:
+            return
+
+        ids = []
+        vectors = []
+
+        for segment in merging:
+            segment_ids, segment_vectors = segment.read_vectors()
+            ids.append(segment_ids)
+            vectors.append(segment_vectors)
+
+        ids = np.concatenate(ids)
+        vectors = np.concatenate(vectors)
+
+        deleted = np.isin(ids, tombstones)
+        dropped = ids[deleted]
+
+        if deleted.any():
+            ids = ids[~deleted]
+            vectors = vectors[~deleted]
+
+        merged = None
 
-            print(f"[INFO] Appended {embeddings.shape[0]} vectors.")
+        if ids.size:
+            with self._lock:
+                path = self._new_segment_path()
 
+            merged = Segment.create(
+                path,
+                self._segment_type(vectors.shape[0]),
+                vectors,
+                ids,
+                **self._index_kwargs()
+            )
+
+        merged_names = {segment.name for segment in merging}
+
+        with self._lock:
+            remaining = [s for s in self.segments if s.name not in merged_names]
+            self.segments = ([merged] if merged else []) + remaining
+            self._write_manifest()
+
+            self._set_tombstones(np.setdiff1d(self.tombstones, dropped))
+
+        self.chunk_store.purge(dropped)
+
+        for segment in merging:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+        print(
+            f"[INFO] Compacted {len(merging)} segments into "
+            f"{merged.name if merged else 'nothing'} ({len(ids)} vectors, {len(dropped)} deleted dropped)."
+        )
+
+    # FILES (duplicate / revision tracking, see IngestionPipeline)
+
+    def find_file(self, content_hash: str):
+        return self.chunk_store.find_file(content_hash)
+
+    def chunk_hashes(self, source: str) -> set:
+        return self.chunk_store.chunk_hashes(source)
+
+    def add_file(self, content_hash: str, source: str, chunks: int):
+        self.chunk_store.add_file(content_hash, source, chunks)
+
+    # DELETE
+
+    def _set_tombstones(self, tombstones: np.ndarray):
+        self.tombstones = np.asarray(tombstones, dtype="int64")
+
+        if self.tombstones.size:
+            self._selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(self.tombstones))
         else:
-            # First time creation Using Cosine
-            self.index = faiss.IndexFlatIP(dimension)
-            self.index.add(embeddings)
-            self.metadata = metadata
+            self._selector = None
 
-            print(f"[INFO] Created new index with {embeddings.shape[0]} vectors.")
+    def delete_source(self, source: str, chunk_hashes=None) -> int:
+        """
+        Delete every chunk of `source` (or only those whose hash is in
+        `chunk_hashes`). Vectors are tombstoned right away and removed
+        from disk by the next compaction. Returns the number deleted.
+        """
+        self._ensure_loaded()
 
-        # Save updated index
-        faiss.write_index(self.index, self.index_path)
+        ids = self.chunk_store.delete(source, chunk_hashes)
 
-        with open(self.meta_path, "wb") as f:
-            pickle.dump(self.metadata, f)
+        if not ids:
+            return 0
 
-        print(f"[INFO] Total vectors in index: {self.index.ntotal}")
+        with self._lock:
+            self._set_tombstones(np.union1d(self.tombstones, np.asarray(ids, dtype="int64")))
+            n_deleted = self.tombstones.size
 
-    # LOAD 
-    def load(self):
-        if not os.path.exists(self.index_path):
-            raise FileNotFoundError("FAISS index not found. Upload document first.")
+            if chunk_hashes is None:
+                self.id_ranges.drop_source(source)
+
+        self._notify({source}, deleted=True)
+
+        print(f"[INFO] Deleted {len(ids)} chunks of {source}.")
+
+        if n_deleted > self.max_deleted_fraction * max(self.ntotal, 1):
+            self.compact_in_background()
 
-        self.index = faiss.read_index(self.index_path)
+        return len(ids)
 
-        with open(self.meta_path, "rb") as f:
-            self.metadata = pickle.load(f)
+    def compact_in_background(self):
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
 
-        print("[INFO] FAISS index loaded successfully.")
+            self._compaction_thread = threading.Thread(
+                target=self.compact,
+                name="faiss-compaction",
+                daemon=True
+            )
+            self._compaction_thread.start()
 
-    #  SEARCH 
-    def search(self, query_text: str, top_k: int = 5):
+    # LOAD
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
 
-        if self.index is None:
+        if os.path.exists(self.manifest_path) or os.path.exists(self.index_path):
             self.load()
 
-        # Encode query (same model as document embedding)
-        query_embedding = embedding_model.encode(
-        [query_text],
-         batch_size=32,
+    def load(self):
+        with self._lock:
+            if not os.path.exists(self.manifest_path):
+                if not os.path.exists(self.index_path):
+                    raise FileNotFoundError("FAISS index not found. Upload document first.")
+
+                self._migrate_single_index()
+
+            else:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+
+                self.next_id = manifest["next_id"]
+                self.next_segment = manifest["next_segment"]
+                self.segments = [
+                    Segment.load(os.path.join(self.segments_dir, name))
+                    for name in manifest["segments"]
+                ]
+
+            # Stores written before the chunk store existed
+            if os.path.exists(self.meta_path) and self.chunk_store.count() == 0:
+                self.chunk_store.import_pickle(self.meta_path)
 
-        convert_to_numpy=True,
-        normalize_embeddings=True
-    ).astype("float32")
+            self._set_tombstones(self.chunk_store.deleted_ids())
+            self.id_ranges = IdRangeIndex(self.chunk_store.id_ranges())
 
-        distances, indices = self.index.search(query_embedding, top_k)
+            self._loaded = True
 
-        results = []
+        print(f"[INFO] FAISS index loaded successfully ({len(self.segments)} segments, {self.ntotal} vectors).")
 
-        for idx, dist in zip(indices[0], distances[0]):
-            if 0 <= idx < len(self.metadata):
-                results.append({
-                    "text": self.metadata[idx].get("text"),
-                    "page": int(self.metadata[idx].get("page", 0)),
-                    "source": self.metadata[idx].get("source", "Unknown"),
+    #  SEARCH
+    def _filter_selector(self, sources: list = None, page_min: int = None, page_max: int = None):
+        """
+        IDSelector over the live chunks matching the filter, or None when
+        nothing matches. Returns (selector, backing array); the array
+        backs a bitmap selector and must outlive the search.
+
+        Small matches (the usual one-document filter) become an
+        IDSelectorBatch of the ids, so the cost follows the number of
+        matching chunks rather than the size of the store.
+        """
+        with self._lock:
+            n_ids = self.next_id
+            tombstones = self.tombstones
+            id_ranges = self.id_ranges
+
+        runs = np.minimum(id_ranges.runs(sources, page_min, page_max), n_ids)
+
+        if int((runs[:, 1] - runs[:, 0]).clip(min=0).sum()) <= BATCH_SELECTOR_MAX_IDS:
+            ids = np.concatenate([np.arange(start, end, dtype="int64") for start, end in runs] or [np.empty(0, dtype="int64")])
+            ids = np.setdiff1d(ids, tombstones)
+
+            if not ids.size:
+                return None, None
+
+            return faiss.IDSelectorBatch(ids), ids
+
+        mask = runs_mask(runs, n_ids)
+        mask[tombstones[tombstones < n_ids]] = False
+
+        if not mask.any():
+            return None, None
+
+        bitmap = np.packbits(mask, bitorder="little")
+
+        # IDSelectorBitmap takes the bitmap size in bytes
+        return faiss.IDSelectorBitmap(bitmap.size, faiss.swig_ptr(bitmap)), bitmap
+
+    def search_vectors(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        nprobe: int = None,
+        ef_search: int = None,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ):
+        """
+        Fan the query out over every segment and merge by score.
+        Returns (scores, ids) shaped (n_queries, top_k); missing slots
+        have id -1.
+
+        `sources` / `page_min` / `page_max` (inclusive, pages as stored)
+        restrict the search inside each index through an id selector, so
+        filtered queries never over-fetch and post-filter.
+        """
+        self._ensure_loaded()
+
+        segments = self.segments
+        selector = self._selector
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype="float32")
+        n_queries = query_embeddings.shape[0]
+
+        empty = (
+            np.full((n_queries, top_k), -np.inf, dtype="float32"),
+            np.full((n_queries, top_k), -1, dtype="int64")
+        )
+
+        if not segments:
+            return empty
+
+        if sources is not None or page_min is not None or page_max is not None:
+            with tracer.span("faiss.filter"):
+                selector, bitmap = self._filter_selector(sources, page_min, page_max)
+
+            if selector is None:
+                return empty
+
+        all_scores = []
+        all_ids = []
+
+        with tracer.span("faiss.search", queries=n_queries, top_k=top_k, segments=len(segments)):
+            for segment in segments:
+                scores, ids = segment.search(
+                    query_embeddings,
+                    top_k,
+                    nprobe=nprobe or self.nprobe,
+                    ef_search=ef_search or self.ef_search,
+                    sel=selector
+                )
+                all_scores.append(np.where(ids >= 0, scores, -np.inf))
+                all_ids.append(ids)
+
+        scores = np.concatenate(all_scores, axis=1)
+        ids = np.concatenate(all_ids, axis=1)
+
+        order = np.argsort(-scores, axis=1)[:, :top_k]
+
+        return (
+            np.take_along_axis(scores, order, axis=1),
+            np.take_along_axis(ids, order, axis=1)
+        )
+
+    def search(
+        self,
+        query_text: str = None,
+        top_k: int = 5,
+        nprobe: int = None,
+        ef_search: int = None,
+        query_embedding: np.ndarray = None,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ):
+        """
+        Pass `query_embedding` (normalised, same model as the documents)
+        when the caller already encoded the query, to skip a second
+        forward pass. Filters are as in search_vectors().
+        """
+        return self.search_batch(
+            [query_text],
+            top_k=top_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            query_embeddings=query_embedding,
+            sources=sources,
+            page_min=page_min,
+            page_max=page_max
+        )[0]
+
+    def search_batch(
+        self,
+        query_texts: list = None,
+        top_k: int = 5,
+        nprobe: int = None,
+        ef_search: int = None,
+        query_embeddings: np.ndarray = None,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ) -> list:
+        """
+        search() for many queries: one encode call (skipped when
+        `query_embeddings` is given), one matrix search per segment and
+        one chunk store read. Returns one result list per query.
+        """
+
+        if query_embeddings is None:
+            # Encode queries (same model as document embedding)
+            query_embeddings = encode_queries(query_texts, self.embedding_model_name)
+
+        query_embeddings = np.atleast_2d(np.asarray(query_embeddings, dtype="float32"))
+
+        distances, indices = self.search_vectors(
+            query_embeddings,
+            top_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            sources=sources,
+            page_min=page_min,
+            page_max=page_max
+        )
+
+        # Fetch only the rows FAISS returned
+        chunks = self.chunk_store.get({int(idx) for idx in indices.ravel() if idx >= 0})
+
+        return [
+            [
+                {
+                    "id": int(idx),
+                    **chunks[idx],
                     "score": float(dist)
-                })
+                }
+                for idx, dist in zip(row_ids, row_scores)
+                if idx in chunks
+            ]
+            for row_ids, row_scores in zip(indices, distances)
+        ]
+
+    def hybrid_candidates(
+        self,
+        query_text: str,
+        query_embedding: np.ndarray,
+        candidates: int = 20,
+        **kwargs
+    ):
+        """
+        The two ranked lists hybrid_search() fuses: dense and keyword
+        [(id, score)], best first, `candidates` deep each.
+        """
+        return self.hybrid_candidates_batch([query_text], query_embedding, candidates, **kwargs)[0]
+
+    def hybrid_candidates_batch(
+        self,
+        query_texts: list,
+        query_embeddings: np.ndarray,
+        candidates: int = 20,
+        nprobe: int = None,
+        ef_search: int = None,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ) -> list:
+        """
+        hybrid_candidates() for many queries: the dense lists come from
+        one matrix search, the keyword lists from one FTS query each.
+        Returns [(dense, keyword)] per query.
+        """
+        filters = {"sources": sources, "page_min": page_min, "page_max": page_max}
+
+        scores, ids = self.search_vectors(
+            np.atleast_2d(np.asarray(query_embeddings, dtype="float32")),
+            candidates,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            **filters
+        )
+
+        return [
+            (
+                [(int(idx), float(score)) for idx, score in zip(row_ids, row_scores) if idx >= 0],
+                self.chunk_store.keyword_search(query_text, candidates, **filters)
+            )
+            for query_text, row_ids, row_scores in zip(query_texts, ids, scores)
+        ]
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        nprobe: int = None,
+        ef_search: int = None,
+        query_embedding: np.ndarray = None,
+        sources: list = None,
+        page_min: int = None,
+        page_max: int = None
+    ):
+        """
+        Dense (FAISS) and keyword (BM25) search, `candidates` deep each,
+        merged with reciprocal rank fusion into the top_k chunks. Both
+        lists honour the filters of search_vectors().
+
+        Each result carries the fused "score" plus "dense_score" /
+        "keyword_score" (None when the chunk was not in that list).
+        Returns (results, dense_floor), where dense_floor is the lowest
+        dense score a new chunk would need to enter the dense list
+        (-inf while that list is not full).
+        """
+        return self.hybrid_search_batch(
+            [query_text],
+            top_k=top_k,
+            candidates=candidates,
+            rrf_k=rrf_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            query_embeddings=query_embedding,
+            sources=sources,
+            page_min=page_min,
+            page_max=page_max
+        )[0]
+
+    def hybrid_search_batch(
+        self,
+        query_texts: list,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        nprobe: int = None,
+        ef_search: int = None,
+        query_embeddings: np.ndarray = None,
+        **filters
+    ) -> list:
+        """
+        hybrid_search() for many queries, with one encode call, one
+        matrix search and one chunk store read for the whole batch.
+        Returns [(results, dense_floor)] per query.
+        """
+
+        if query_embeddings is None:
+            query_embeddings = encode_queries(query_texts, self.embedding_model_name)
+
+        per_query = self.hybrid_candidates_batch(
+            query_texts,
+            query_embeddings,
+            candidates,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            **filters
+        )
+
+        fused_lists = [
+            reciprocal_rank_fusion(
+                [[idx for idx, _ in dense], [idx for idx, _ in keyword]],
+                k=rrf_k,
+                top_n=top_k
+            )
+            for dense, keyword in per_query
+        ]
+
+        chunks = self.chunk_store.get({idx for fused in fused_lists for idx, _ in fused})
+
+        batch = []
+
+        for (dense, keyword), fused in zip(per_query, fused_lists):
+            dense_scores = dict(dense)
+            keyword_scores = dict(keyword)
+
+            results = [
+                {
+                    "id": idx,
+                    **chunks[idx],
+                    "score": score,
+                    "dense_score": dense_scores.get(idx),
+                    "keyword_score": keyword_scores.get(idx)
+                }
+                for idx, score in fused
+                if idx in chunks
+            ]
+
+            dense_floor = dense[-1][1] if len(dense) >= candidates else -np.inf
+
+            batch.append((results, dense_floor))
 
-        return results
+        return batch
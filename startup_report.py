@@ -0,0 +1,162 @@
+"""
+Import-time budget report for the API server.
+
+Imports main in a fresh interpreter under `python -X importtime` and
+reports the wall time of the import (everything a replica does before
+it can answer /healthz) and the modules that cost the most, grouped by
+top-level package. Exits with status 1 when the import takes longer
+than --budget-ms, so it can gate CI or an image build.
+
+With --warmup the same process then runs the background warm-up
+(model loads, dummy encode / rerank, default collection, LLM client)
+synchronously and reports each step, i.e. the time until /readyz
+turns 200.
+
+Usage:
+    python startup_report.py
+    python startup_report.py --budget-ms 1500 --top 15
+    python startup_report.py --warmup --json startup_report.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+# Runs in the child: timed import of main, optionally the warm-up,
+# then one JSON line on stdout (import-time lines go to stderr)
+CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - start) * 1000
+warmup = None
+if {warmup}:
+    main.warmup.run()
+    warmup = main.warmup.status()
+main.shutdown_workers()
+print("STARTUP_REPORT " + json.dumps({{"import_ms": import_ms, "warmup": warmup}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    (module, self µs, cumulative µs, depth) per `-X importtime` line.
+    """
+    modules = []
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        # "import time:   self |   cumulative | <2 spaces per level>name"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    return modules
+
+
+def summarise(modules: list, top: int) -> dict:
+
+    # Top-level imports only, so nested modules are not counted twice
+    packages = defaultdict(int)
+    for name, _, cumulative_us, depth in modules:
+        if depth == 0:
+            packages[name.split(".")[0]] += cumulative_us
+
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:top]
+
+    return {
+        "packages_ms": {
+            name: round(us / 1000, 2)
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_modules_self_ms": {name: round(self_us / 1000, 2) for name, self_us, _, _ in slowest}
+    }
+
+
+def run(args) -> dict:
+
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "mock")
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(warmup=args.warmup)],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    line = next((line for line in result.stdout.splitlines() if line.startswith("STARTUP_REPORT ")), None)
+
+    if result.returncode != 0 or line is None:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("Importing main failed:\n" + "\n".join(errors[-20:]))
+
+    child = json.loads(line[len("STARTUP_REPORT "):])
+
+    return {
+        "import_ms": round(child["import_ms"], 2),
+        "budget_ms": args.budget_ms,
+        "within_budget": child["import_ms"] <= args.budget_ms,
+        **summarise(parse_importtime(result.stderr), args.top),
+        "warmup": child["warmup"]
+    }
+
+
+def print_report(report: dict):
+
+    print("\n" + "=" * 64)
+    verdict = "OK" if report["within_budget"] else "OVER BUDGET"
+    print(f"import main: {report['import_ms']:.0f} ms (budget {report['budget_ms']:.0f} ms) {verdict}")
+    print("=" * 64)
+
+    print(f"{'Top-level import':<44}{'cumulative ms':>20}")
+    for name, ms in report["packages_ms"].items():
+        print(f"{name:<44}{ms:>20.1f}")
+
+    print("-" * 64)
+    print(f"{'Module':<44}{'self ms':>20}")
+    for name, ms in report["slowest_modules_self_ms"].items():
+        print(f"{name:<44}{ms:>20.1f}")
+
+    if report["warmup"]:
+        warmup = report["warmup"]
+        print("-" * 64)
+        print(f"Warm-up: {warmup['state']}, {warmup['elapsed_ms'] or 0:.0f} ms")
+
+        for name, step in warmup["steps"].items():
+            ms = f"{step['ms']:.0f} ms" if "ms" in step else ""
+            print(f"  {name:<30}{step['status']:<10}{ms:>12}  {step.get('error', '')}")
+
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=3000, help="max wall time of `import main`")
+    parser.add_argument("--top", type=int, default=10, help="packages / modules to list")
+    parser.add_argument("--warmup", action="store_true", help="also run and time the warm-up")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
+
+    sys.exit(0 if report["within_budget"] else 1)